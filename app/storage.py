@@ -4,7 +4,7 @@ import logging
 import sqlite3
 import json
 import threading
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Tuple, Optional
 from pathlib import Path
 import pytz
@@ -12,6 +12,16 @@ import pytz
 logger = logging.getLogger(__name__)
 
 
+def _day_range(date: str) -> Tuple[str, str]:
+    """
+    Half-open [date, next day) bounds for filtering an ISO timestamp column.
+    
+    Unlike substr(col, 1, 10) = ?, a plain range on the column can use its index.
+    """
+    next_day = datetime.strptime(date, "%Y-%m-%d") + timedelta(days=1)
+    return date, next_day.strftime("%Y-%m-%d")
+
+
 class Storage:
     """SQLite storage for events and aggregations."""
     
@@ -206,6 +216,89 @@ class Storage:
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_aggregations_date ON aggregations(date)
             """)
+            # Covering indexes for the date-range export queries (export/db_queries.py)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_events_ts_dir_cam
+                ON events(timestamp, direction, camera_id)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_missing_periods_start
+                ON missing_periods(start_time, end_time, duration_minutes, session, alert_sent)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_alert_logs_time
+                ON alert_logs(alert_time, expected_total, current_total, missing)
+            """)
+            # Date lookups of export/export_daily_excel.py (WHERE date(alert_time) = ?)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_alert_logs_date ON alert_logs(date(alert_time))
+            """)
+            
+            # events.direction is stored as canonical 'IN'/'OUT' so readers can compare
+            # it directly instead of wrapping every predicate in UPPER(); fix legacy rows
+            cursor.execute("""
+                UPDATE events SET direction = UPPER(direction)
+                WHERE direction IN ('in', 'out')
+            """)
+            
+            # event_minute_counts: per-minute IN/OUT rollup of events, kept current by
+            # triggers so morning/realtime nets are a sum over <= 1440 rows per day
+            # instead of a scan of every event (the morning window stays configurable)
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='event_minute_counts'")
+            minute_counts_exists = cursor.fetchone() is not None
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS event_minute_counts (
+                    date TEXT NOT NULL,
+                    minute TEXT NOT NULL,
+                    in_count INTEGER NOT NULL DEFAULT 0,
+                    out_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (date, minute)
+                ) WITHOUT ROWID
+            """)
+            if not minute_counts_exists:
+                cursor.execute("""
+                    INSERT INTO event_minute_counts (date, minute, in_count, out_count)
+                    SELECT substr(timestamp, 1, 10), substr(timestamp, 12, 5),
+                           SUM(direction = 'IN'), SUM(direction = 'OUT')
+                    FROM events
+                    GROUP BY 1, 2
+                """)
+                logger.info("Created event_minute_counts rollup from existing events")
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_events_minute_counts_ai AFTER INSERT ON events
+                BEGIN
+                    INSERT INTO event_minute_counts (date, minute, in_count, out_count)
+                    VALUES (substr(NEW.timestamp, 1, 10), substr(NEW.timestamp, 12, 5),
+                            NEW.direction = 'IN', NEW.direction = 'OUT')
+                    ON CONFLICT(date, minute) DO UPDATE SET
+                        in_count = in_count + excluded.in_count,
+                        out_count = out_count + excluded.out_count;
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_events_minute_counts_ad AFTER DELETE ON events
+                BEGIN
+                    UPDATE event_minute_counts
+                    SET in_count = in_count - (OLD.direction = 'IN'),
+                        out_count = out_count - (OLD.direction = 'OUT')
+                    WHERE date = substr(OLD.timestamp, 1, 10) AND minute = substr(OLD.timestamp, 12, 5);
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_events_minute_counts_au AFTER UPDATE OF timestamp, direction ON events
+                BEGIN
+                    UPDATE event_minute_counts
+                    SET in_count = in_count - (OLD.direction = 'IN'),
+                        out_count = out_count - (OLD.direction = 'OUT')
+                    WHERE date = substr(OLD.timestamp, 1, 10) AND minute = substr(OLD.timestamp, 12, 5);
+                    INSERT INTO event_minute_counts (date, minute, in_count, out_count)
+                    VALUES (substr(NEW.timestamp, 1, 10), substr(NEW.timestamp, 12, 5),
+                            NEW.direction = 'IN', NEW.direction = 'OUT')
+                    ON CONFLICT(date, minute) DO UPDATE SET
+                        in_count = in_count + excluded.in_count,
+                        out_count = out_count + excluded.out_count;
+                END
+            """)
             
             conn.commit()
         except sqlite3.Error as e:
@@ -336,11 +429,11 @@ class Storage:
                 conn = self._get_connection()
                 cursor = conn.cursor()
                 
-                # Insert into events table (legacy - keep original direction)
+                # Insert into events table (canonical uppercase direction)
                 cursor.execute("""
                     INSERT INTO events (timestamp, track_id, direction, camera_id, created_at)
                     VALUES (?, ?, ?, ?, ?)
-                """, (timestamp, track_id, direction, camera_id, timestamp))
+                """, (timestamp, track_id, direction_upper, camera_id, timestamp))
                 
                 event_id = cursor.lastrowid
                 
@@ -410,8 +503,8 @@ class Storage:
         
         cursor.execute("""
             SELECT 
-                SUM(CASE WHEN direction = 'in' THEN 1 ELSE 0 END) as count_in,
-                SUM(CASE WHEN direction = 'out' THEN 1 ELSE 0 END) as count_out
+                SUM(CASE WHEN direction = 'IN' THEN 1 ELSE 0 END) as count_in,
+                SUM(CASE WHEN direction = 'OUT' THEN 1 ELSE 0 END) as count_out
             FROM events
             WHERE timestamp >= ? AND timestamp <= ? AND camera_id = ?
         """, (start_str, end_str, camera_id))
@@ -711,7 +804,7 @@ class Storage:
             SELECT COUNT(*) as count
             FROM events
             WHERE timestamp >= ? AND direction = ? AND camera_id = ?
-        """, (start_iso, direction, camera_id))
+        """, (start_iso, direction.upper(), camera_id))
         
         row = cursor.fetchone()
         conn.close()
@@ -739,18 +832,16 @@ class Storage:
             end_hour, end_min = map(int, morning_end.split(':'))
             
             # Query events in morning phase
-            # Handle timestamp with timezone format (e.g., '2026-01-07T09:31:01+07:00')
-            # Use substr() to parse date and time from ISO 8601 format
-            start_minutes = start_hour * 60 + start_min
-            end_minutes = end_hour * 60 + end_min
+            # Timestamps are ISO 8601 with timezone (e.g., '2026-01-07T09:31:01+07:00'), so
+            # [date T HH:MM, date T HH:MM) is a lexicographic range that idx_events_timestamp serves
+            lower = f"{date}T{start_hour:02d}:{start_min:02d}"
+            upper = f"{date}T{end_hour:02d}:{end_min:02d}"
             cursor.execute("""
                 SELECT direction, COUNT(*) as count
                 FROM events
-                WHERE substr(timestamp, 1, 10) = ?
-                  AND CAST(substr(timestamp, 12, 2) AS INTEGER) * 60 + CAST(substr(timestamp, 15, 2) AS INTEGER) >= ?
-                  AND CAST(substr(timestamp, 12, 2) AS INTEGER) * 60 + CAST(substr(timestamp, 15, 2) AS INTEGER) < ?
+                WHERE timestamp >= ? AND timestamp < ?
                 GROUP BY direction
-            """, (date, start_minutes, end_minutes))
+            """, (lower, upper))
             
             results = cursor.fetchall()
             in_count = 0
@@ -817,8 +908,8 @@ class Storage:
                 start_iso = morning_end_time.isoformat()
                 cursor.execute("""
                     SELECT 
-                        SUM(CASE WHEN direction = 'in' THEN 1 ELSE 0 END) as count_in,
-                        SUM(CASE WHEN direction = 'out' THEN 1 ELSE 0 END) as count_out
+                        SUM(CASE WHEN direction = 'IN' THEN 1 ELSE 0 END) as count_in,
+                        SUM(CASE WHEN direction = 'OUT' THEN 1 ELSE 0 END) as count_out
                     FROM people_events
                     WHERE event_time >= ? AND camera_id = ?
                 """, (start_iso, camera_id))
@@ -826,8 +917,8 @@ class Storage:
                 # Count all events for the day
                 cursor.execute("""
                     SELECT 
-                        SUM(CASE WHEN direction = 'in' THEN 1 ELSE 0 END) as count_in,
-                        SUM(CASE WHEN direction = 'out' THEN 1 ELSE 0 END) as count_out
+                        SUM(CASE WHEN direction = 'IN' THEN 1 ELSE 0 END) as count_in,
+                        SUM(CASE WHEN direction = 'OUT' THEN 1 ELSE 0 END) as count_out
                     FROM people_events
                     WHERE date(event_time) = ? AND camera_id = ?
                 """, (date, camera_id))
@@ -978,10 +1069,10 @@ class Storage:
             cursor.execute("""
                 SELECT id, start_time, end_time, duration_minutes, session, alert_sent
                 FROM missing_periods
-                WHERE substr(start_time, 1, 10) = ? AND session = ? AND end_time IS NULL
+                WHERE start_time >= ? AND start_time < ? AND session = ? AND end_time IS NULL
                 ORDER BY start_time DESC
                 LIMIT 1
-            """, (date, session))
+            """, (*_day_range(date), session))
             
             row = cursor.fetchone()
             if row:
@@ -1024,22 +1115,22 @@ class Storage:
                 cursor.execute("""
                     SELECT alert_time
                     FROM alert_logs
-                    WHERE substr(alert_time, 1, 10) = ?
+                    WHERE alert_time >= ? AND alert_time < ?
                       AND phase = ?
                       AND (notification_status = 'sent' OR notification_status IS NULL)
                     ORDER BY alert_time DESC
                     LIMIT 1
-                """, (date, session))
+                """, (*_day_range(date), session))
             else:
                 # Fallback if notification_status column doesn't exist
                 cursor.execute("""
                     SELECT alert_time
                     FROM alert_logs
-                    WHERE substr(alert_time, 1, 10) = ?
+                    WHERE alert_time >= ? AND alert_time < ?
                       AND phase = ?
                     ORDER BY alert_time DESC
                     LIMIT 1
-                """, (date, session))
+                """, (*_day_range(date), session))
             
             row = cursor.fetchone()
             if row:
@@ -1091,22 +1182,22 @@ class Storage:
                 cursor.execute("""
                     SELECT missing
                     FROM alert_logs
-                    WHERE substr(alert_time, 1, 10) = ?
+                    WHERE alert_time >= ? AND alert_time < ?
                       AND phase = ?
                       AND (notification_status = 'sent' OR notification_status IS NULL)
                     ORDER BY alert_time DESC
                     LIMIT 1
-                """, (date, session))
+                """, (*_day_range(date), session))
             else:
                 # Fallback if notification_status column doesn't exist
                 cursor.execute("""
                     SELECT missing
                     FROM alert_logs
-                    WHERE substr(alert_time, 1, 10) = ?
+                    WHERE alert_time >= ? AND alert_time < ?
                       AND phase = ?
                     ORDER BY alert_time DESC
                     LIMIT 1
-                """, (date, session))
+                """, (*_day_range(date), session))
             
             row = cursor.fetchone()
             if row:
@@ -1138,9 +1229,9 @@ class Storage:
             cursor.execute("""
                 SELECT id, start_time, end_time, duration_minutes, session, alert_sent
                 FROM missing_periods
-                WHERE substr(start_time, 1, 10) = ?
+                WHERE start_time >= ? AND start_time < ?
                 ORDER BY start_time ASC
-            """, (date,))
+            """, _day_range(date))
             
             periods = []
             for row in cursor.fetchall():
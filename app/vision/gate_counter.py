@@ -1,7 +1,9 @@
 """Gate Counter with band-based crossing detection."""
 
 import logging
-from typing import Dict, Optional, Tuple, Literal
+import math
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple, Literal
 from dataclasses import dataclass
 from enum import Enum
 import numpy as np
@@ -9,6 +11,91 @@ import time
 
 logger = logging.getLogger(__name__)
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    # Compiled kernels (app/vision/_gate_ext.pyx), only present when built
+    from app.vision import _gate_ext
+    GATE_EXT_AVAILABLE = True
+except ImportError:
+    GATE_EXT_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    # Fused per-frame classification kernels for update_batch: one pass over the
+    # (N, 2) points returns (in_gate, side_code, dist_to_gate). Side codes index
+    # GateCounter._side_names.
+    
+    # Fast-math without 'nnan'/'ninf': unset gate bounds arrive as +/-inf, and
+    # those flags would let LLVM fold the x >= -inf style comparisons.
+    _FASTMATH = {'contract', 'afn', 'reassoc', 'arcp', 'nsz'}
+    
+    @njit(parallel=True, cache=True, fastmath=_FASTMATH)
+    def _classify_horizontal(pts, gate_y, half_h, x_min, x_max):
+        n = pts.shape[0]
+        in_gate = np.empty(n, np.bool_)
+        side = np.empty(n, np.int8)
+        dist = np.empty(n, np.float64)
+        for i in prange(n):
+            x = pts[i, 0]
+            y = pts[i, 1]
+            y_dist = abs(y - gate_y)
+            in_gate[i] = y_dist <= half_h and x >= x_min and x <= x_max
+            side[i] = 0 if y < gate_y else 1
+            dist[i] = max(0.0, y_dist - half_h)
+        return in_gate, side, dist
+    
+    @njit(parallel=True, cache=True, fastmath=_FASTMATH)
+    def _classify_vertical(pts, gate_x, half_w, y_min, y_max, use_zones):
+        n = pts.shape[0]
+        in_gate = np.empty(n, np.bool_)
+        side = np.empty(n, np.int8)
+        dist = np.empty(n, np.float64)
+        for i in prange(n):
+            x = pts[i, 0]
+            y = pts[i, 1]
+            x_dist = abs(x - gate_x)
+            if use_zones:
+                # 0 = IN_ZONE, 1 = OUT_ZONE, 2 = GATE
+                if x < gate_x - half_w:
+                    side[i] = 0
+                    in_gate[i] = False
+                elif x > gate_x + half_w:
+                    side[i] = 1
+                    in_gate[i] = False
+                else:
+                    side[i] = 2
+                    in_gate[i] = True
+            else:
+                side[i] = 0 if x < gate_x else 1
+                in_gate[i] = x_dist <= half_w and y >= y_min and y <= y_max
+            dist[i] = max(0.0, x_dist - half_w)
+        return in_gate, side, dist
+    
+    @njit(parallel=True, cache=True, fastmath=_FASTMATH)
+    def _classify_line(pts, p1x, p1y, gvx, gvy, length, half_t):
+        n = pts.shape[0]
+        in_gate = np.empty(n, np.bool_)
+        side = np.empty(n, np.int8)
+        dist = np.empty(n, np.float64)
+        length_sq = length * length
+        for i in prange(n):
+            dx = pts[i, 0] - p1x
+            dy = pts[i, 1] - p1y
+            cross = gvx * dy - gvy * dx
+            t = (dx * gvx + dy * gvy) / length_sq
+            side[i] = 0 if cross > 0 else 1
+            in_gate[i] = t >= 0.0 and t <= 1.0 and abs(cross) / length <= half_t
+            tc = min(max(t, 0.0), 1.0)
+            ex = dx - tc * gvx
+            ey = dy - tc * gvy
+            dist[i] = max(0.0, math.sqrt(ex * ex + ey * ey) - half_t)
+        return in_gate, side, dist
+
 
 class GateMode(Enum):
     """Gate mode types."""
@@ -17,7 +104,7 @@ class GateMode(Enum):
     LINE_BAND = "LINE_BAND"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class GateEvent:
     """Gate crossing event."""
     track_id: int
@@ -32,6 +119,12 @@ class GateEvent:
 class TrackState:
     """State for a single track."""
     
+    __slots__ = (
+        "last_side", "in_gate", "entry_side", "exit_side", "frames_in_gate",
+        "last_point", "last_ts", "counted", "last_count_ts", "last_count_point",
+        "points_history",
+    )
+    
     def __init__(self):
         self.last_side: Optional[str] = None
         self.in_gate: bool = False  # True if currently inside gate band
@@ -75,6 +168,9 @@ class GateCounter:
         min_frames_in_gate: int = 2,
         min_travel_px: float = 15.0,
         rearm_dist_px: float = 50.0,  # Distance to move away from gate before allowing re-count
+        # Event history
+        events_maxlen: int = 10_000,
+        event_callback: Optional[Callable[[GateEvent], None]] = None,
     ):
         """
         Initialize gate counter.
@@ -92,6 +188,8 @@ class GateCounter:
             cooldown_sec: Cooldown time in seconds to prevent double counting
             min_frames_in_gate: Minimum frames inside gate before counting
             min_travel_px: Minimum travel distance in pixels to count
+            events_maxlen: Maximum number of recent events kept in memory
+            event_callback: Optional listener called with each GateEvent
         """
         self.gate_mode = GateMode(gate_mode)
         self.cooldown_sec = cooldown_sec
@@ -137,6 +235,13 @@ class GateCounter:
             self.gate_thickness = gate_thickness
             self.gate_vec = self.gate_p2 - self.gate_p1
             self.gate_length = np.linalg.norm(self.gate_vec)
+            # Scalar copies used by the per-point helpers (the arrays above are kept
+            # for get_gate_geometry and the vectorized batch path)
+            self._p1x, self._p1y = float(self.gate_p1[0]), float(self.gate_p1[1])
+            self._p2x, self._p2y = float(self.gate_p2[0]), float(self.gate_p2[1])
+            self._gvx, self._gvy = float(self.gate_vec[0]), float(self.gate_vec[1])
+            self._gate_length = math.hypot(self._gvx, self._gvy)
+            self._gate_length_sq = self._gate_length * self._gate_length
             logger.info(
                 f"Line band gate: p1={gate_p1}, p2={gate_p2}, thickness={gate_thickness}"
             )
@@ -166,100 +271,243 @@ class GateCounter:
         # Track states
         self.track_states: Dict[int, TrackState] = {}
         
-        # Counts
-        self.count_in = 0
-        self.count_out = 0
+        # Counts: index 0 = IN, 1 = OUT
+        self._counts = np.zeros(2, dtype=np.int64)
+        
+        # Events history: bounded ring of compact
+        # (track_id, timestamp, direction, entry_side, exit_side) tuples
+        self.events: Deque[Tuple[int, float, str, str, str]] = deque(maxlen=events_maxlen)
+        self._event_cb = event_callback
+        
+        # Bind mode-specific helpers once: gate_mode never changes after construction,
+        # so the per-call `self.gate_mode ==` chains are resolved here instead of per frame.
+        self._use_zones = self.gate_mode == GateMode.VERTICAL_BAND and self.use_buffer_zones
+        self._get_side = {
+            GateMode.HORIZONTAL_BAND: self._get_side_horizontal,
+            GateMode.VERTICAL_BAND: self._get_side_vertical,
+            GateMode.LINE_BAND: self._get_side_line,
+        }[self.gate_mode]
+        if self.gate_mode == GateMode.LINE_BAND:
+            # Specialized closure with the gate's affine coefficients baked in
+            self._is_in_gate = self._make_is_in_gate_line()
+        else:
+            self._is_in_gate = {
+                GateMode.HORIZONTAL_BAND: self._is_in_gate_horizontal,
+                GateMode.VERTICAL_BAND: self._is_in_gate_vertical,
+            }[self.gate_mode]
+        self._distance_to_gate = {
+            GateMode.HORIZONTAL_BAND: self._distance_to_gate_horizontal,
+            GateMode.VERTICAL_BAND: self._distance_to_gate_vertical,
+            GateMode.LINE_BAND: self._distance_to_gate_line,
+        }[self.gate_mode]
+        self._distance_to_gate_batch = {
+            GateMode.HORIZONTAL_BAND: self._distance_to_gate_horizontal_batch,
+            GateMode.VERTICAL_BAND: self._distance_to_gate_vertical_batch,
+            GateMode.LINE_BAND: self._distance_to_gate_line_batch,
+        }[self.gate_mode]
+        self._get_zone = self._get_zone_buffered if self._use_zones else self._get_side
+        
+        # Fused classification kernel for update_batch: compiled extension, then
+        # numba, else None -> NumPy/per-point fallback
+        if self.gate_mode == GateMode.HORIZONTAL_BAND:
+            self._side_names = ("TOP", "BOTTOM")
+        elif self._use_zones:
+            self._side_names = ("IN_ZONE", "OUT_ZONE", "GATE")
+        else:
+            self._side_names = ("LEFT", "RIGHT")
+        self._classify_batch = (
+            self._make_classify_batch() if GATE_EXT_AVAILABLE or NUMBA_AVAILABLE else None
+        )
         
-        # Events history
-        self.events: list[GateEvent] = []
+        # Entry side -> direction lookup table. The "assumed exit" rule and
+        # direction_mapping are fixed, so resolve every possible entry side once.
+        if self._use_zones:
+            possible_sides = ("IN_ZONE", "OUT_ZONE", "GATE")
+        elif self.gate_mode == GateMode.HORIZONTAL_BAND:
+            possible_sides = ("TOP", "BOTTOM")
+        else:  # VERTICAL_BAND or LINE_BAND
+            possible_sides = ("LEFT", "RIGHT")
+        self._entry_to_direction: Dict[str, str] = {
+            side: self._resolve_direction(side) for side in possible_sides
+        }
+        self._direction_index = {
+            side: 0 if direction == "IN" else 1
+            for side, direction in self._entry_to_direction.items()
+        }
     
-    def _get_zone(self, point: Tuple[float, float]) -> str:
-        """Get zone of point: IN_ZONE, GATE, or OUT_ZONE (for VERTICAL_BAND with buffer zones)."""
-        if self.gate_mode == GateMode.VERTICAL_BAND and self.use_buffer_zones:
-            x = point[0]
-            if x < self.in_zone_right:
-                return "IN_ZONE"
-            elif x > self.out_zone_left:
-                return "OUT_ZONE"
-            else:
-                return "GATE"
-        # Fallback to side-based logic
-        return self._get_side(point)
+    @property
+    def count_in(self) -> int:
+        """Number of IN crossings counted."""
+        return int(self._counts[0])
+    
+    @property
+    def count_out(self) -> int:
+        """Number of OUT crossings counted."""
+        return int(self._counts[1])
     
-    def _get_side(self, point: Tuple[float, float]) -> str:
-        """Get side of point relative to gate."""
+    def _make_classify_batch(self) -> Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Bind the classification kernel for this gate mode to its scalar params."""
+        if GATE_EXT_AVAILABLE:
+            classify_horizontal = _gate_ext.classify_horizontal
+            classify_vertical = _gate_ext.classify_vertical
+            classify_line = _gate_ext.classify_line
+        else:
+            classify_horizontal = _classify_horizontal
+            classify_vertical = _classify_vertical
+            classify_line = _classify_line
+        
         if self.gate_mode == GateMode.HORIZONTAL_BAND:
-            y = point[1]
-            if y < self.gate_y:
-                return "TOP"
-            else:
-                return "BOTTOM"
-        elif self.gate_mode == GateMode.VERTICAL_BAND:
-            x = point[0]
-            if x < self.gate_x:
-                return "LEFT"
+            x_min = -math.inf if self.gate_x_min is None else float(self.gate_x_min)
+            x_max = math.inf if self.gate_x_max is None else float(self.gate_x_max)
+            args = (float(self.gate_y), self.gate_height / 2, x_min, x_max)
+            return lambda pts: classify_horizontal(pts, *args)
+        if self.gate_mode == GateMode.VERTICAL_BAND:
+            y_min = -math.inf if self.gate_y_min is None else float(self.gate_y_min)
+            y_max = math.inf if self.gate_y_max is None else float(self.gate_y_max)
+            args = (float(self.gate_x), self.gate_width / 2, y_min, y_max, self._use_zones)
+            return lambda pts: classify_vertical(pts, *args)
+        args = (
+            self._p1x, self._p1y, self._gvx, self._gvy,
+            self._gate_length, self.gate_thickness / 2,
+        )
+        return lambda pts: classify_line(pts, *args)
+    
+    def _resolve_direction(self, entry_side: str) -> str:
+        """Resolve counting direction for a track entering the gate from entry_side."""
+        direction = None
+        
+        if self._use_zones:
+            # For buffer zones: IN_ZONE -> GATE = IN, OUT_ZONE -> GATE = OUT
+            if entry_side == "IN_ZONE":
+                direction = "IN"
+            elif entry_side == "OUT_ZONE":
+                direction = "OUT"
             else:
-                return "RIGHT"
-        else:  # LINE_BAND
-            point_vec = np.array(point, dtype=np.float32) - self.gate_p1
-            # Cross product to determine side
-            cross = np.cross(self.gate_vec, point_vec)
-            if cross > 0:
-                return "LEFT"
+                # Fallback: try to map using direction_mapping
+                # Assume exit will be opposite zone
+                if entry_side in ["IN_ZONE", "LEFT"]:
+                    direction_key = ("LEFT", "RIGHT")
+                else:
+                    direction_key = ("RIGHT", "LEFT")
+                direction = self.direction_mapping.get(direction_key)
+        else:
+            # Use direction_mapping with entry_side and assumed exit_side
+            # For horizontal: TOP entry -> assume BOTTOM exit, BOTTOM entry -> assume TOP exit
+            # For vertical/line: LEFT entry -> assume RIGHT exit, RIGHT entry -> assume LEFT exit
+            if self.gate_mode == GateMode.HORIZONTAL_BAND:
+                exit_side = "BOTTOM" if entry_side == "TOP" else "TOP"
+            else:  # VERTICAL_BAND or LINE_BAND
+                exit_side = "RIGHT" if entry_side == "LEFT" else "LEFT"
+            direction = self.direction_mapping.get((entry_side, exit_side))
+        
+        # Fallback if direction_mapping doesn't have the key
+        if not direction:
+            # Default logic based on gate mode
+            if self.gate_mode == GateMode.HORIZONTAL_BAND:
+                direction = "IN" if entry_side == "BOTTOM" else "OUT"
             else:
-                return "RIGHT"
+                direction = "IN" if entry_side == "LEFT" else "OUT"
+        
+        return direction
     
-    def _is_in_gate(self, point: Tuple[float, float]) -> bool:
-        """Check if point is inside gate band."""
-        if self.gate_mode == GateMode.HORIZONTAL_BAND:
-            y = point[1]
-            x = point[0]
-            
-            # Check Y within band
-            y_dist = abs(y - self.gate_y)
-            if y_dist > self.gate_height / 2:
-                return False
-            
-            # Check X range if specified
-            if self.gate_x_min is not None and x < self.gate_x_min:
-                return False
-            if self.gate_x_max is not None and x > self.gate_x_max:
-                return False
-            
-            return True
-        elif self.gate_mode == GateMode.VERTICAL_BAND:
+    def _get_zone_buffered(self, point: Tuple[float, float]) -> str:
+        """Get zone of point: IN_ZONE, GATE, or OUT_ZONE (for VERTICAL_BAND with buffer zones)."""
+        x = point[0]
+        if x < self.in_zone_right:
+            return "IN_ZONE"
+        elif x > self.out_zone_left:
+            return "OUT_ZONE"
+        else:
+            return "GATE"
+    
+    def _get_side_horizontal(self, point: Tuple[float, float]) -> str:
+        """Get side of point relative to horizontal band."""
+        if point[1] < self.gate_y:
+            return "TOP"
+        else:
+            return "BOTTOM"
+    
+    def _get_side_vertical(self, point: Tuple[float, float]) -> str:
+        """Get side of point relative to vertical band."""
+        if point[0] < self.gate_x:
+            return "LEFT"
+        else:
+            return "RIGHT"
+    
+    def _get_side_line(self, point: Tuple[float, float]) -> str:
+        """Get side of point relative to line band."""
+        # 2D cross product (gate_vec x point_vec) to determine side
+        cross = self._gvx * (point[1] - self._p1y) - self._gvy * (point[0] - self._p1x)
+        if cross > 0:
+            return "LEFT"
+        else:
+            return "RIGHT"
+    
+    def _is_in_gate_horizontal(self, point: Tuple[float, float]) -> bool:
+        """Check if point is inside horizontal band."""
+        y = point[1]
+        x = point[0]
+        
+        # Check Y within band
+        y_dist = abs(y - self.gate_y)
+        if y_dist > self.gate_height / 2:
+            return False
+        
+        # Check X range if specified
+        if self.gate_x_min is not None and x < self.gate_x_min:
+            return False
+        if self.gate_x_max is not None and x > self.gate_x_max:
+            return False
+        
+        return True
+    
+    def _is_in_gate_vertical(self, point: Tuple[float, float]) -> bool:
+        """Check if point is inside vertical band."""
+        x = point[0]
+        y = point[1]
+        
+        # Check X within band
+        x_dist = abs(x - self.gate_x)
+        if x_dist > self.gate_width / 2:
+            return False
+        
+        # Check Y range if specified
+        if self.gate_y_min is not None and y < self.gate_y_min:
+            return False
+        if self.gate_y_max is not None and y > self.gate_y_max:
+            return False
+        
+        return True
+    
+    def _make_is_in_gate_line(self) -> Callable[[Tuple[float, float]], bool]:
+        """
+        Build the LINE_BAND membership test for this gate.
+        
+        The projection onto the segment and the signed distance to the line are
+        affine in (x, y) once gate_p1/gate_p2 are fixed, so the coefficients are
+        computed here and the returned test needs no vector math or norm.
+        """
+        p1x, p1y = self._p1x, self._p1y
+        gvx, gvy = self._gvx, self._gvy
+        length = self._gate_length
+        length_sq = self._gate_length_sq
+        # Projection parameter along the segment: t = tx*x + ty*y + t0
+        tx = gvx / length_sq
+        ty = gvy / length_sq
+        t0 = -(p1x * gvx + p1y * gvy) / length_sq
+        # Signed distance to the line using its unit normal: nx*x + ny*y + c
+        nx = -gvy / length
+        ny = gvx / length
+        c = -(nx * p1x + ny * p1y)
+        half_thickness = self.gate_thickness / 2
+        
+        def is_in_gate_line(point: Tuple[float, float]) -> bool:
             x = point[0]
             y = point[1]
-            
-            # Check X within band
-            x_dist = abs(x - self.gate_x)
-            if x_dist > self.gate_width / 2:
-                return False
-            
-            # Check Y range if specified
-            if self.gate_y_min is not None and y < self.gate_y_min:
-                return False
-            if self.gate_y_max is not None and y > self.gate_y_max:
-                return False
-            
-            return True
-        else:  # LINE_BAND
-            point_vec = np.array(point, dtype=np.float32) - self.gate_p1
-            
-            # Project point onto line
-            t = np.dot(point_vec, self.gate_vec) / (self.gate_length ** 2)
-            
-            # Check if projection is within line segment
-            if t < 0 or t > 1:
-                return False
-            
-            # Get closest point on line
-            closest_point = self.gate_p1 + t * self.gate_vec
-            
-            # Calculate distance from point to line
-            dist = np.linalg.norm(np.array(point, dtype=np.float32) - closest_point)
-            
-            return dist <= self.gate_thickness / 2
+            t = tx * x + ty * y + t0
+            return 0.0 <= t <= 1.0 and abs(nx * x + ny * y + c) <= half_thickness
+        
+        return is_in_gate_line
     
     def _calculate_travel_distance(self, state: TrackState) -> float:
         """Calculate travel distance from points history."""
@@ -274,23 +522,40 @@ class GateCounter:
             np.array(last_point, dtype=np.float32) - np.array(first_point, dtype=np.float32)
         )
     
-    def _distance_to_gate(self, point: Tuple[float, float]) -> float:
-        """Calculate minimum distance from point to gate."""
-        if self.gate_mode == GateMode.VERTICAL_BAND:
-            x = point[0]
-            x_dist = abs(x - self.gate_x)
-            return max(0, x_dist - self.gate_width / 2)
-        elif self.gate_mode == GateMode.HORIZONTAL_BAND:
-            y = point[1]
-            y_dist = abs(y - self.gate_y)
-            return max(0, y_dist - self.gate_height / 2)
-        else:  # LINE_BAND
-            point_vec = np.array(point, dtype=np.float32) - self.gate_p1
-            t = np.dot(point_vec, self.gate_vec) / (self.gate_length ** 2)
-            t = np.clip(t, 0, 1)
-            closest_point = self.gate_p1 + t * self.gate_vec
-            dist = np.linalg.norm(np.array(point, dtype=np.float32) - closest_point)
-            return max(0, dist - self.gate_thickness / 2)
+    def _distance_to_gate_vertical(self, point: Tuple[float, float]) -> float:
+        """Calculate minimum distance from point to vertical band."""
+        x_dist = abs(point[0] - self.gate_x)
+        return max(0, x_dist - self.gate_width / 2)
+    
+    def _distance_to_gate_horizontal(self, point: Tuple[float, float]) -> float:
+        """Calculate minimum distance from point to horizontal band."""
+        y_dist = abs(point[1] - self.gate_y)
+        return max(0, y_dist - self.gate_height / 2)
+    
+    def _distance_to_gate_line(self, point: Tuple[float, float]) -> float:
+        """Calculate minimum distance from point to line band."""
+        dx = point[0] - self._p1x
+        dy = point[1] - self._p1y
+        t = (dx * self._gvx + dy * self._gvy) / self._gate_length_sq
+        t = min(max(t, 0.0), 1.0)
+        dist = math.hypot(dx - t * self._gvx, dy - t * self._gvy)
+        return max(0, dist - self.gate_thickness / 2)
+    
+    def _distance_to_gate_vertical_batch(self, pts: np.ndarray) -> np.ndarray:
+        """Vectorized _distance_to_gate_vertical for an (N, 2) array of points."""
+        return np.maximum(0.0, np.abs(pts[:, 0] - self.gate_x) - self.gate_width / 2)
+    
+    def _distance_to_gate_horizontal_batch(self, pts: np.ndarray) -> np.ndarray:
+        """Vectorized _distance_to_gate_horizontal for an (N, 2) array of points."""
+        return np.maximum(0.0, np.abs(pts[:, 1] - self.gate_y) - self.gate_height / 2)
+    
+    def _distance_to_gate_line_batch(self, pts: np.ndarray) -> np.ndarray:
+        """Vectorized _distance_to_gate_line for an (N, 2) array of points."""
+        point_vecs = pts.astype(np.float32) - self.gate_p1
+        t = np.clip(point_vecs @ self.gate_vec / (self.gate_length ** 2), 0, 1)
+        closest_points = self.gate_p1 + t[:, None] * self.gate_vec
+        dist = np.linalg.norm(pts.astype(np.float32) - closest_points, axis=1)
+        return np.maximum(0.0, dist - self.gate_thickness / 2)
     
     def update(
         self,
@@ -318,17 +583,116 @@ class GateCounter:
         
         state = self.track_states[track_id]
         
-        # Determine current position relative to gate
-        if self.gate_mode == GateMode.VERTICAL_BAND and self.use_buffer_zones:
-            current_zone = self._get_zone(point)
-            is_in_gate = (current_zone == "GATE")
-            current_side = current_zone
+        # Check cooldown
+        in_cooldown = state.counted and (ts - state.last_count_ts) < self.cooldown_sec
+        
+        # Check rearm distance: if moved far enough from gate, allow re-count
+        rearm_dist = None
+        if state.counted and not in_cooldown and state.last_count_point is not None:
+            dist_to_gate = self._distance_to_gate(point)
+            if dist_to_gate >= self.rearm_dist_px:
+                rearm_dist = dist_to_gate
+        
+        current_side, is_in_gate = self._classify(point)
+        return self._advance(
+            track_id, state, point, ts, current_side, is_in_gate, in_cooldown, rearm_dist
+        )
+    
+    def update_batch(
+        self,
+        track_ids: Sequence[int],
+        points: Sequence[Tuple[float, float]],
+        ts: Optional[float] = None,
+    ) -> List[GateEvent]:
+        """
+        Update all tracks of one frame at once.
+        
+        Cooldown and rearm checks are evaluated for every track with a single
+        NumPy mask instead of per-track branches; the remaining per-track state
+        machine is the same as update().
+        
+        Args:
+            track_ids: Track IDs of the frame
+            points: Bottom-center points (x, y), one per track ID
+            ts: Timestamp shared by the frame (defaults to current time)
+        
+        Returns:
+            List of GateEvent for tracks that crossed in this frame
+        """
+        if ts is None:
+            ts = time.time()
+        
+        n = len(track_ids)
+        if n == 0:
+            return []
+        
+        # C-contiguous: the _gate_ext kernels take const double[:, ::1] views
+        pts = np.ascontiguousarray(points, dtype=np.float64).reshape(n, 2)
+        
+        states = []
+        for track_id in track_ids:
+            state = self.track_states.get(track_id)
+            if state is None:
+                state = self.track_states[track_id] = TrackState()
+            states.append(state)
+        
+        if self._classify_batch is not None:
+            in_gate, side_codes, dist = self._classify_batch(pts)
         else:
-            current_side = self._get_side(point)
-            is_in_gate = self._is_in_gate(point)
+            in_gate = side_codes = None
+            dist = self._distance_to_gate_batch(pts)
         
-        # Check cooldown
-        if state.counted and (ts - state.last_count_ts) < self.cooldown_sec:
+        counted = np.fromiter((state.counted for state in states), dtype=bool, count=n)
+        last_count_ts = np.fromiter((state.last_count_ts for state in states), dtype=np.float64, count=n)
+        
+        # Tracks still in cooldown this frame
+        cooldown = counted & (ts - last_count_ts < self.cooldown_sec)
+        # Counted tracks past cooldown that moved far enough away to count again
+        rearm = counted & ~cooldown & (dist >= self.rearm_dist_px)
+        
+        side_names = self._side_names
+        events = []
+        for i in range(n):
+            point = (float(pts[i, 0]), float(pts[i, 1]))
+            if side_codes is None:
+                current_side, is_in_gate = self._classify(point)
+            else:
+                current_side = side_names[side_codes[i]]
+                is_in_gate = bool(in_gate[i])
+            event = self._advance(
+                track_ids[i],
+                states[i],
+                point,
+                ts,
+                current_side,
+                is_in_gate,
+                bool(cooldown[i]),
+                float(dist[i]) if rearm[i] else None,
+            )
+            if event is not None:
+                events.append(event)
+        return events
+    
+    def _classify(self, point: Tuple[float, float]) -> Tuple[str, bool]:
+        """Return (current side or zone, is_in_gate) for a single point."""
+        if self._use_zones:
+            current_zone = self._get_zone(point)
+            return current_zone, current_zone == "GATE"
+        return self._get_side(point), self._is_in_gate(point)
+    
+    def _advance(
+        self,
+        track_id: int,
+        state: TrackState,
+        point: Tuple[float, float],
+        ts: float,
+        current_side: str,
+        is_in_gate: bool,
+        in_cooldown: bool,
+        rearm_dist: Optional[float],
+    ) -> Optional[GateEvent]:
+        """Advance one track's state machine given its position and cooldown/rearm status."""
+        if in_cooldown:
             # Still in cooldown, just update state
             state.last_point = point
             state.last_ts = ts
@@ -336,12 +700,10 @@ class GateCounter:
             state.in_gate = is_in_gate
             return None
         
-        # Check rearm distance: if moved far enough from gate, allow re-count
-        if state.counted and state.last_count_point is not None:
-            dist_to_gate = self._distance_to_gate(point)
-            if dist_to_gate >= self.rearm_dist_px:
-                state.counted = False
-                logger.debug(f"Track {track_id} rearmed (moved {dist_to_gate:.1f}px from gate)")
+        if rearm_dist is not None:
+            state.counted = False
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Track %s rearmed (moved %.1fpx from gate)", track_id, rearm_dist)
         
         event = None
         
@@ -349,75 +711,34 @@ class GateCounter:
         if is_in_gate and not state.in_gate:
             # Just entered gate - count if conditions met
             if not state.counted:
-                # Determine direction based on entry side
+                # Determine direction based on entry side (precomputed in __init__)
                 entry_side = state.last_side if state.last_side else current_side
-                direction = None
-                
-                if self.gate_mode == GateMode.VERTICAL_BAND and self.use_buffer_zones:
-                    # For buffer zones: IN_ZONE -> GATE = IN, OUT_ZONE -> GATE = OUT
-                    if entry_side == "IN_ZONE":
-                        direction = "IN"
-                    elif entry_side == "OUT_ZONE":
-                        direction = "OUT"
-                    else:
-                        # Fallback: try to map using direction_mapping
-                        # Assume exit will be opposite zone
-                        if entry_side in ["IN_ZONE", "LEFT"]:
-                            direction_key = ("LEFT", "RIGHT")
-                        else:
-                            direction_key = ("RIGHT", "LEFT")
-                        direction = self.direction_mapping.get(direction_key)
-                else:
-                    # Use direction_mapping with entry_side and assumed exit_side
-                    # For horizontal: TOP entry -> assume BOTTOM exit, BOTTOM entry -> assume TOP exit
-                    # For vertical/line: LEFT entry -> assume RIGHT exit, RIGHT entry -> assume LEFT exit
-                    if self.gate_mode == GateMode.HORIZONTAL_BAND:
-                        if entry_side == "TOP":
-                            exit_side = "BOTTOM"
-                        else:
-                            exit_side = "TOP"
-                    else:  # VERTICAL_BAND or LINE_BAND
-                        if entry_side == "LEFT":
-                            exit_side = "RIGHT"
-                        else:
-                            exit_side = "LEFT"
-                    
-                    direction_key = (entry_side, exit_side)
-                    direction = self.direction_mapping.get(direction_key)
-                
-                # Fallback if direction_mapping doesn't have the key
-                if not direction:
-                    # Default logic based on gate mode
-                    if self.gate_mode == GateMode.HORIZONTAL_BAND:
-                        direction = "IN" if entry_side == "BOTTOM" else "OUT"
-                    else:
-                        direction = "IN" if entry_side == "LEFT" else "OUT"
+                direction = self._entry_to_direction[entry_side]
                 
                 # Count
-                if direction == "IN":
-                    self.count_in += 1
-                else:
-                    self.count_out += 1
+                self._counts[self._direction_index[entry_side]] += 1
                 
                 # Create event
                 event = GateEvent(
                     track_id=track_id,
                     timestamp=ts,
                     direction=direction,
-                    entry_side=state.last_side or current_side,
+                    entry_side=entry_side,
                     exit_side=current_side,
                     frames_in_gate=1,
                     travel_distance=0.0,
                 )
                 
-                self.events.append(event)
+                self.events.append((track_id, ts, direction, entry_side, current_side))
+                if self._event_cb is not None:
+                    self._event_cb(event)
                 
                 # Mark as counted
                 state.counted = True
                 state.last_count_ts = ts
                 state.last_count_point = point
                 
-                logger.info(f"Track {track_id} entered gate: {direction}")
+                logger.info("Track %s entered gate: %s", track_id, direction)
         
         # Update state
         state.in_gate = is_in_gate
@@ -429,15 +750,14 @@ class GateCounter:
     
     def get_counts(self) -> Dict[str, int]:
         """Get current counts."""
-        return {"in": self.count_in, "out": self.count_out}
+        return {"in": int(self._counts[0]), "out": int(self._counts[1])}
     
     def reset_daily(self, date: Optional[str] = None):
         """Reset counts for new day."""
-        self.count_in = 0
-        self.count_out = 0
+        self._counts[:] = 0
         self.track_states.clear()
         self.events.clear()
-        logger.info(f"Counts reset for date: {date or 'today'}")
+        logger.info("Counts reset for date: %s", date or "today")
     
     def get_gate_geometry(self) -> Dict:
         """Get gate geometry for visualization."""
@@ -1,13 +1,83 @@
 """Gate Counter using segment-crossing algorithm for fast counting."""
 
 import logging
+import math
 import time
-from typing import Dict, Optional, Tuple
+from collections import deque
+from itertools import islice
+from typing import Callable, Deque, Dict, List, Optional, Tuple
 from dataclasses import dataclass
-import numpy as np
 
 logger = logging.getLogger(__name__)
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _segments_cross(
+    p1x: float, p1y: float, p2x: float, p2y: float,
+    q1x: float, q1y: float, q2x: float, q2y: float,
+) -> bool:
+    """
+    Check if segment p1-p2 intersects segment q1-q2.
+    
+    Orientations of the ordered triplets are inlined as cross products and
+    reduced branchlessly to their sign (-1/0/+1, 0 = collinear); the collinear
+    special cases fall back to bounding-box tests.
+    """
+    v = (p2y - p1y) * (q1x - p2x) - (p2x - p1x) * (q1y - p2y)
+    o1 = (v > 1e-9) - (v < -1e-9)
+    v = (p2y - p1y) * (q2x - p2x) - (p2x - p1x) * (q2y - p2y)
+    o2 = (v > 1e-9) - (v < -1e-9)
+    v = (q2y - q1y) * (p1x - q2x) - (q2x - q1x) * (p1y - q2y)
+    o3 = (v > 1e-9) - (v < -1e-9)
+    v = (q2y - q1y) * (p2x - q2x) - (q2x - q1x) * (p2y - q2y)
+    o4 = (v > 1e-9) - (v < -1e-9)
+    
+    # General case: segments intersect if orientations are different
+    if o1 != o2 and o3 != o4:
+        return True
+    
+    # Special cases: collinear point lying within the other segment's bounds
+    if o1 == 0 and min(p1x, p2x) <= q1x <= max(p1x, p2x) and min(p1y, p2y) <= q1y <= max(p1y, p2y):
+        return True
+    if o2 == 0 and min(p1x, p2x) <= q2x <= max(p1x, p2x) and min(p1y, p2y) <= q2y <= max(p1y, p2y):
+        return True
+    if o3 == 0 and min(q1x, q2x) <= p1x <= max(q1x, q2x) and min(q1y, q2y) <= p1y <= max(q1y, q2y):
+        return True
+    if o4 == 0 and min(q1x, q2x) <= p2x <= max(q1x, q2x) and min(q1y, q2y) <= p2y <= max(q1y, q2y):
+        return True
+    
+    return False
+
+
+def _update_kernel(
+    last_x: float, last_y: float, px: float, py: float, last_side: int, cur_side: int,
+    p1x: float, p1y: float, p2x: float, p2y: float,
+) -> Tuple[float, bool]:
+    """
+    Geometry of one track step against the gate.
+    
+    Returns:
+        (travel_distance, intersects); intersects is only evaluated when the
+        side changed between two non-zero sides.
+    """
+    travel = math.hypot(px - last_x, py - last_y)
+    intersects = False
+    if cur_side != last_side and cur_side != 0 and last_side != 0:
+        intersects = _segments_cross(last_x, last_y, px, py, p1x, p1y, p2x, p2y)
+    return travel, intersects
+
+
+if NUMBA_AVAILABLE:
+    # Fast-math without 'nnan'/'ninf', so NaN or inf coordinates keep IEEE comparison results
+    _FASTMATH = {'contract', 'afn', 'reassoc', 'arcp', 'nsz'}
+    _segments_cross = njit(cache=True, fastmath=_FASTMATH)(_segments_cross)
+    _update_kernel = njit(cache=True, fastmath=_FASTMATH)(_update_kernel)
+
 
 @dataclass
 class SegmentEvent:
@@ -24,16 +94,26 @@ class SegmentEvent:
 class TrackState:
     """State for a single track."""
     
+    __slots__ = (
+        "has_point", "last_x", "last_y", "last_ts", "last_side", "last_count_ts", "last_log_ts",
+    )
+    
     def __init__(self):
-        self.last_point: Optional[Tuple[float, float]] = None
+        self.has_point: bool = False  # True once the first point has been seen
+        self.last_x: float = 0.0
+        self.last_y: float = 0.0
         self.last_ts: float = 0.0
         self.last_side: int = 0  # +1, -1, or 0
         self.last_count_ts: float = 0.0
+        self.last_log_ts: float = 0.0  # Last side-change log, for rate limiting
 
 
 class GateCounterSegment:
     """Gate counter using segment-crossing algorithm."""
     
+    # Sweep stale track states once every 1024 updates
+    _SWEEP_MASK = 1023
+    
     def __init__(
         self,
         gate_p1: Tuple[float, float],
@@ -46,6 +126,8 @@ class GateCounterSegment:
         direction_mapping_down: Optional[str] = None,
         x_range_min: Optional[float] = None,
         x_range_max: Optional[float] = None,
+        events_maxlen: int = 10_000,
+        stale_track_ttl_sec: float = 30.0,
     ):
         """
         Initialize segment-based gate counter.
@@ -61,17 +143,24 @@ class GateCounterSegment:
             direction_mapping_down: Direction for downward movement (if gate is horizontal)
             x_range_min: Optional X minimum for gate region
             x_range_max: Optional X maximum for gate region
+            events_maxlen: Maximum number of recent events kept in memory
+            stale_track_ttl_sec: Drop track states not updated for this long (seconds)
         """
-        self.gate_p1 = np.array(gate_p1, dtype=np.float32)
-        self.gate_p2 = np.array(gate_p2, dtype=np.float32)
-        self.gate_vec = self.gate_p2 - self.gate_p1
+        # Gate geometry as plain floats (no NumPy scalar boxing in the hot path)
+        self._p1x, self._p1y = float(gate_p1[0]), float(gate_p1[1])
+        self._p2x, self._p2y = float(gate_p2[0]), float(gate_p2[1])
+        self._gx, self._gy = self._p2x - self._p1x, self._p2y - self._p1y
+        self._is_vertical = abs(self._gx) < 1e-6
+        self._get_side = self._make_side_fn()
+        self.gate_p1 = (self._p1x, self._p1y)
+        self.gate_p2 = (self._p2x, self._p2y)
         self.cooldown_sec = cooldown_sec
         self.min_travel_px = min_travel_px
         self.x_range_min = x_range_min
         self.x_range_max = x_range_max
         
         # Check if gate is horizontal (for UP/DOWN mapping)
-        self.is_horizontal = abs(self.gate_p1[1] - self.gate_p2[1]) < 1.0
+        self.is_horizontal = abs(self._gy) < 1.0
         
         # Direction mapping
         if self.is_horizontal and direction_mapping_up is not None:
@@ -89,117 +178,59 @@ class GateCounterSegment:
             }
             logger.info(f"General gate: POS_TO_NEG={direction_mapping_pos_to_neg}, NEG_TO_POS={direction_mapping_neg_to_pos}")
         
-        # Track states
+        # Track states, swept for stale entries periodically in update()
         self.track_states: Dict[int, TrackState] = {}
+        self._stale_ttl = stale_track_ttl_sec
+        self._update_count = 0
         
         # Counts
         self.count_in = 0
         self.count_out = 0
         
-        # Events history
-        self.events: list[SegmentEvent] = []
+        # Events history: bounded ring, oldest events are evicted automatically
+        self.events: Deque[SegmentEvent] = deque(maxlen=events_maxlen)
         
         logger.info(
             f"GateCounterSegment initialized: gate_p1={gate_p1}, gate_p2={gate_p2}, "
             f"cooldown={cooldown_sec}s, min_travel={min_travel_px}px"
         )
     
-    def _get_side(self, point: Tuple[float, float]) -> int:
+    def _make_side_fn(self) -> Callable[[Tuple[float, float]], int]:
         """
-        Get side of point relative to gate line.
+        Build the side test for this gate.
         
-        Returns:
-            +1 if point is on one side (POS)
-            -1 if point is on other side (NEG)
-            0 if point is on the line
+        The returned function maps a point to +1 (POS side), -1 (NEG side) or
+        0 (on the line). The gate is fixed, so the vertical/horizontal/diagonal
+        choice is made once here and the gate components are captured as locals.
         """
-        point_vec = np.array(point, dtype=np.float32) - self.gate_p1
-        # Cross product: (gate_p2 - gate_p1) x (point - gate_p1)
-        cross = np.cross(self.gate_vec, point_vec)
-        
-        # For vertical gate (dx ≈ 0), use x coordinate directly
-        if abs(self.gate_vec[0]) < 1e-6:  # Vertical gate
-            if abs(point[0] - self.gate_p1[0]) < 2.0:  # Within 2px tolerance
+        p1x, p1y = self._p1x, self._p1y
+        gx, gy = self._gx, self._gy
+        
+        if self._is_vertical:
+            # Vertical gate (dx ≈ 0): use x coordinate directly, 2px tolerance
+            def side_vertical(point: Tuple[float, float]) -> int:
+                dx = point[0] - p1x
+                if abs(dx) < 2.0:
+                    return 0
+                return -1 if dx < 0 else 1
+            return side_vertical
+        
+        if gy == 0.0:
+            # Horizontal gate: cross product reduces to gx * (y - p1y)
+            def side_horizontal(point: Tuple[float, float]) -> int:
+                cross = gx * (point[1] - p1y)
+                if abs(cross) < 1e-6:
+                    return 0
+                return 1 if cross > 0 else -1
+            return side_horizontal
+        
+        # Diagonal gate: (gate_p2 - gate_p1) x (point - gate_p1)
+        def side_general(point: Tuple[float, float]) -> int:
+            cross = gx * (point[1] - p1y) - gy * (point[0] - p1x)
+            if abs(cross) < 1e-6:
                 return 0
-            elif point[0] < self.gate_p1[0]:
-                return -1  # NEG (left side)
-            else:
-                return 1   # POS (right side)
-        
-        # For horizontal or diagonal gate, use cross product
-        if abs(cross) < 1e-6:  # On the line
-            return 0
-        elif cross > 0:
-            return 1  # POS side
-        else:
-            return -1  # NEG side
-    
-    def _orientation(self, p: np.ndarray, q: np.ndarray, r: np.ndarray) -> int:
-        """
-        Find orientation of ordered triplet (p, q, r).
-        
-        Returns:
-            0: Collinear
-            1: Clockwise
-            2: Counterclockwise
-        """
-        val = (q[1] - p[1]) * (r[0] - q[0]) - (q[0] - p[0]) * (r[1] - q[1])
-        if abs(val) < 1e-9:
-            return 0
-        return 1 if val > 0 else 2
-    
-    def _on_segment(self, p: np.ndarray, q: np.ndarray, r: np.ndarray) -> bool:
-        """Check if point q lies on segment pr."""
-        if self._orientation(p, q, r) != 0:
-            return False
-        return (
-            q[0] <= max(p[0], r[0]) and q[0] >= min(p[0], r[0]) and
-            q[1] <= max(p[1], r[1]) and q[1] >= min(p[1], r[1])
-        )
-    
-    def _segment_intersect(
-        self,
-        p1: Tuple[float, float],
-        p2: Tuple[float, float],
-        q1: Tuple[float, float],
-        q2: Tuple[float, float],
-    ) -> bool:
-        """
-        Check if two segments intersect.
-        
-        Args:
-            p1, p2: Endpoints of first segment
-            q1, q2: Endpoints of second segment (gate)
-        
-        Returns:
-            True if segments intersect, False otherwise
-        """
-        p1_arr = np.array(p1, dtype=np.float32)
-        p2_arr = np.array(p2, dtype=np.float32)
-        q1_arr = np.array(q1, dtype=np.float32)
-        q2_arr = np.array(q2, dtype=np.float32)
-        
-        # Find the four orientations needed
-        o1 = self._orientation(p1_arr, p2_arr, q1_arr)
-        o2 = self._orientation(p1_arr, p2_arr, q2_arr)
-        o3 = self._orientation(q1_arr, q2_arr, p1_arr)
-        o4 = self._orientation(q1_arr, q2_arr, p2_arr)
-        
-        # General case: segments intersect if orientations are different
-        if o1 != o2 and o3 != o4:
-            return True
-        
-        # Special cases: collinear points
-        if o1 == 0 and self._on_segment(p1_arr, q1_arr, p2_arr):
-            return True
-        if o2 == 0 and self._on_segment(p1_arr, q2_arr, p2_arr):
-            return True
-        if o3 == 0 and self._on_segment(q1_arr, p1_arr, q2_arr):
-            return True
-        if o4 == 0 and self._on_segment(q1_arr, p2_arr, q2_arr):
-            return True
-        
-        return False
+            return 1 if cross > 0 else -1
+        return side_general
     
     def update(
         self,
@@ -221,102 +252,113 @@ class GateCounterSegment:
         if ts is None:
             ts = time.time()
         
+        # Amortized O(1) cleanup of tracks that disappeared from the tracker
+        self._update_count += 1
+        if self._update_count & self._SWEEP_MASK == 0:
+            cutoff = ts - self._stale_ttl
+            self.track_states = {
+                tid: st for tid, st in self.track_states.items() if st.last_ts >= cutoff
+            }
+        
         # Get or create track state
         if track_id not in self.track_states:
             self.track_states[track_id] = TrackState()
         
         state = self.track_states[track_id]
         
+        px, py = point
+        
         # Check if we have a previous point
-        if state.last_point is None:
-            state.last_point = point
+        if not state.has_point:
+            state.has_point = True
+            state.last_x, state.last_y = px, py
             state.last_ts = ts
             state.last_side = self._get_side(point)
             return None
         
+        # Current side, computed once and reused by every branch below
+        cur_side = self._get_side(point)
+        
         # Check cooldown
         if (ts - state.last_count_ts) < self.cooldown_sec:
             # Still in cooldown, update state but don't check crossing
-            cooldown_remaining = self.cooldown_sec - (ts - state.last_count_ts)
-            if track_id % 10 == 0:  # Log every 10th frame to avoid spam
-                logger.debug(f"Track {track_id}: In cooldown ({cooldown_remaining:.2f}s remaining)")
-            state.last_point = point
+            if track_id % 10 == 0 and logger.isEnabledFor(logging.DEBUG):  # Log every 10th track to avoid spam
+                cooldown_remaining = self.cooldown_sec - (ts - state.last_count_ts)
+                logger.debug("Track %s: In cooldown (%.2fs remaining)", track_id, cooldown_remaining)
+            state.last_x, state.last_y = px, py
             state.last_ts = ts
-            state.last_side = self._get_side(point)
+            state.last_side = cur_side
             return None
         
-        # Calculate travel distance
-        travel_distance = np.linalg.norm(
-            np.array(point, dtype=np.float32) - np.array(state.last_point, dtype=np.float32)
+        # Travel distance and gate intersection for this step
+        travel_distance, intersects = _update_kernel(
+            state.last_x, state.last_y, px, py,
+            state.last_side, cur_side,
+            self._p1x, self._p1y, self._p2x, self._p2y,
         )
         
         if travel_distance < self.min_travel_px:
             # Not enough movement, update state but don't check crossing
-            if track_id % 30 == 0:  # Log occasionally
-                logger.debug(f"Track {track_id}: Travel distance {travel_distance:.1f}px < min {self.min_travel_px}px")
-            state.last_point = point
+            if track_id % 30 == 0 and logger.isEnabledFor(logging.DEBUG):  # Log occasionally
+                logger.debug(
+                    "Track %s: Travel distance %.1fpx < min %spx",
+                    track_id, travel_distance, self.min_travel_px,
+                )
+            state.last_x, state.last_y = px, py
             state.last_ts = ts
-            state.last_side = self._get_side(point)
+            state.last_side = cur_side
             return None
         
         # Check X range if specified
-        if self.x_range_min is not None and point[0] < self.x_range_min:
-            state.last_point = point
+        if self.x_range_min is not None and px < self.x_range_min:
+            state.last_x, state.last_y = px, py
             state.last_ts = ts
-            state.last_side = self._get_side(point)
+            state.last_side = cur_side
             return None
         
-        if self.x_range_max is not None and point[0] > self.x_range_max:
-            state.last_point = point
+        if self.x_range_max is not None and px > self.x_range_max:
+            state.last_x, state.last_y = px, py
             state.last_ts = ts
-            state.last_side = self._get_side(point)
+            state.last_side = cur_side
             return None
         
-        # Get current side
-        cur_side = self._get_side(point)
-        
-        # Always check intersection when side changes (for debugging)
-        intersects = False
+        # Side changed between non-zero sides: intersection was checked in the kernel
         if state.last_side != cur_side and state.last_side != 0 and cur_side != 0:
-            # Side changed - check if segment intersects gate
-            intersects = self._segment_intersect(
-                state.last_point,
-                point,
-                tuple(self.gate_p1),
-                tuple(self.gate_p2),
-            )
-            
-            # Log side changes for debugging (INFO level for visibility)
-            logger.info(
-                f"Track {track_id}: Side changed ({state.last_side} -> {cur_side}), "
-                f"intersects={intersects}, travel={travel_distance:.1f}px, "
-                f"last_point={state.last_point}, cur_point={point}, "
-                f"gate_p1={tuple(self.gate_p1)}, gate_p2={tuple(self.gate_p2)}"
-            )
-        elif state.last_side != cur_side:
+            # Log side changes for debugging (INFO level for visibility),
+            # at most once per second per track
+            if ts - state.last_log_ts > 1.0 and logger.isEnabledFor(logging.INFO):
+                state.last_log_ts = ts
+                logger.info(
+                    "Track %s: Side changed (%s -> %s), intersects=%s, travel=%.1fpx, "
+                    "last_point=%s, cur_point=%s, gate_p1=%s, gate_p2=%s",
+                    track_id, state.last_side, cur_side, intersects, travel_distance,
+                    (state.last_x, state.last_y), point, self.gate_p1, self.gate_p2,
+                )
+        elif state.last_side != cur_side and logger.isEnabledFor(logging.DEBUG):
             # Side changed but one side is 0 (on the line)
             logger.debug(
-                f"Track {track_id}: Side changed ({state.last_side} -> {cur_side}) but one side is 0 (on line)"
+                "Track %s: Side changed (%s -> %s) but one side is 0 (on line)",
+                track_id, state.last_side, cur_side,
             )
         
         # Check if side changed and both sides are non-zero
         if state.last_side == 0 or cur_side == 0:
             # On the line, update state
-            state.last_point = point
+            state.last_x, state.last_y = px, py
             state.last_ts = ts
             state.last_side = cur_side
             return None
         
         if state.last_side == cur_side:
             # Same side, no crossing
-            state.last_point = point
+            state.last_x, state.last_y = px, py
             state.last_ts = ts
             return None
         
         # Side changed - check if segment intersects gate (already computed above)
         if not intersects:
             # No intersection, update state
-            state.last_point = point
+            state.last_x, state.last_y = px, py
             state.last_ts = ts
             state.last_side = cur_side
             return None
@@ -327,7 +369,7 @@ class GateCounterSegment:
         # Determine direction
         if self.is_horizontal and "UP" in self.direction_mapping:
             # Horizontal gate: use UP/DOWN
-            if point[1] < state.last_point[1]:
+            if py < state.last_y:
                 direction_key = "UP"
             else:
                 direction_key = "DOWN"
@@ -339,7 +381,7 @@ class GateCounterSegment:
                 direction_key = "NEG_TO_POS"
             else:
                 # Should not happen, but handle gracefully
-                state.last_point = point
+                state.last_x, state.last_y = px, py
                 state.last_ts = ts
                 state.last_side = cur_side
                 return None
@@ -347,7 +389,7 @@ class GateCounterSegment:
         direction = self.direction_mapping.get(direction_key)
         if not direction:
             logger.warning(f"No direction mapping for {direction_key}")
-            state.last_point = point
+            state.last_x, state.last_y = px, py
             state.last_ts = ts
             state.last_side = cur_side
             return None
@@ -363,7 +405,7 @@ class GateCounterSegment:
             track_id=track_id,
             timestamp=ts,
             direction=direction,
-            prev_point=state.last_point,
+            prev_point=(state.last_x, state.last_y),
             cur_point=point,
             prev_side=state.last_side,
             cur_side=cur_side,
@@ -375,13 +417,12 @@ class GateCounterSegment:
         state.last_count_ts = ts
         
         logger.info(
-            f"Track {track_id} crossed gate: {direction} "
-            f"(side {state.last_side} -> {cur_side}), "
-            f"travel={travel_distance:.1f}px"
+            "Track %s crossed gate: %s (side %s -> %s), travel=%.1fpx",
+            track_id, direction, state.last_side, cur_side, travel_distance,
         )
         
         # Update state
-        state.last_point = point
+        state.last_x, state.last_y = px, py
         state.last_ts = ts
         state.last_side = cur_side
         
@@ -391,6 +432,10 @@ class GateCounterSegment:
         """Get current counts."""
         return {"in": self.count_in, "out": self.count_out}
     
+    def get_recent_events(self, n: int) -> List[SegmentEvent]:
+        """Get the n most recent events, oldest first."""
+        return list(islice(self.events, max(0, len(self.events) - n), None))
+    
     def reset_daily(self, date: Optional[str] = None):
         """Reset counts for new day."""
         self.count_in = 0
@@ -403,8 +448,8 @@ class GateCounterSegment:
         """Get gate geometry for visualization."""
         return {
             "type": "segment",
-            "p1": tuple(self.gate_p1),
-            "p2": tuple(self.gate_p2),
+            "p1": self.gate_p1,
+            "p2": self.gate_p2,
             "x_range_min": self.x_range_min,
             "x_range_max": self.x_range_max,
         }
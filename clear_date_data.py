@@ -1,26 +1,37 @@
 """Clear all data for a specific date from database."""
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 
 date_to_clear = "2026-01-07"
 db_path = "data/people_counter.db"
 
+# Half-open range [date, next day) on the ISO timestamp strings; unlike
+# substr(timestamp, 1, 10) = ? this can use the timestamp indexes.
+next_day = (datetime.strptime(date_to_clear, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+date_range = (date_to_clear, next_day)
+
 print(f"Clearing all data for date: {date_to_clear}")
 print(f"Database: {db_path}")
 print()
 
 conn = sqlite3.connect(db_path)
+conn.execute("PRAGMA journal_mode=WAL")
+conn.execute("PRAGMA synchronous=NORMAL")
 cursor = conn.cursor()
 
 try:
+    # Make sure the range predicates below are index-backed
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_alert_logs_alert_time ON alert_logs(alert_time)")
+    
     # Count records before deletion
-    cursor.execute("SELECT COUNT(*) FROM events WHERE substr(timestamp, 1, 10) = ?", (date_to_clear,))
+    cursor.execute("SELECT COUNT(*) FROM events WHERE timestamp >= ? AND timestamp < ?", date_range)
     events_count = cursor.fetchone()[0]
     
     cursor.execute("SELECT COUNT(*) FROM daily_state WHERE date = ?", (date_to_clear,))
     daily_state_count = cursor.fetchone()[0]
     
-    cursor.execute("SELECT COUNT(*) FROM alert_logs WHERE substr(alert_time, 1, 10) = ?", (date_to_clear,))
+    cursor.execute("SELECT COUNT(*) FROM alert_logs WHERE alert_time >= ? AND alert_time < ?", date_range)
     alerts_count = cursor.fetchone()[0]
     
     print(f"Records to delete:")
@@ -29,8 +40,11 @@ try:
     print(f"  Alerts: {alerts_count}")
     print()
     
+    # Delete everything in a single write transaction
+    cursor.execute("BEGIN IMMEDIATE")
+    
     # Delete events
-    cursor.execute("DELETE FROM events WHERE substr(timestamp, 1, 10) = ?", (date_to_clear,))
+    cursor.execute("DELETE FROM events WHERE timestamp >= ? AND timestamp < ?", date_range)
     events_deleted = cursor.rowcount
     print(f"[OK] Deleted {events_deleted} events")
     
@@ -40,7 +54,7 @@ try:
     print(f"[OK] Deleted {daily_state_deleted} daily_state records")
     
     # Delete alert_logs
-    cursor.execute("DELETE FROM alert_logs WHERE substr(alert_time, 1, 10) = ?", (date_to_clear,))
+    cursor.execute("DELETE FROM alert_logs WHERE alert_time >= ? AND alert_time < ?", date_range)
     alerts_deleted = cursor.rowcount
     print(f"[OK] Deleted {alerts_deleted} alert records")
     
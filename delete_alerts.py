@@ -1,7 +1,8 @@
 import sqlite3
 conn = sqlite3.connect('data/people_counter.db')
 cursor = conn.cursor()
-cursor.execute("DELETE FROM alert_logs WHERE substr(alert_time, 1, 10) = '2026-01-08'")
+# Range on the ISO string (index-friendly) instead of substr(alert_time, 1, 10)
+cursor.execute("DELETE FROM alert_logs WHERE alert_time >= '2026-01-08' AND alert_time < '2026-01-09'")
 conn.commit()
 print(f'Deleted {cursor.rowcount} alerts')
 conn.close()
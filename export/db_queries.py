@@ -5,11 +5,133 @@ SQLite is the single source of truth.
 
 import sqlite3
 import logging
-from datetime import datetime, time as dt_time
-from typing import List, Dict, Optional, Tuple
+from datetime import datetime, timedelta, time as dt_time
+from typing import Iterator, List, Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Statement text is kept at module level so every call hands sqlite3 the same
+# string and its per-connection statement cache can reuse the prepared query.
+# Storage._init_db upper-cases direction, but a database written by an older Storage
+# and not yet reopened can still hold lowercase 'in'/'out' rows; reads accept both.
+_SQL_IN_OUT = """
+    SELECT COALESCE(SUM(CASE WHEN direction IN ('IN', 'in') THEN 1
+                             WHEN direction IN ('OUT', 'out') THEN -1
+                             ELSE 0 END), 0) as net_count
+    FROM events
+    WHERE timestamp >= ? AND timestamp < ?
+"""
+
+# Same nets read from the trigger-maintained per-minute rollup (Storage._init_db);
+# _SQL_IN_OUT stays as the fallback for databases created before the rollup existed
+_SQL_TOTAL_MORNING = """
+    SELECT COALESCE(SUM(in_count - out_count), 0)
+    FROM event_minute_counts
+    WHERE date = ? AND minute >= ? AND minute < ?
+"""
+
+_SQL_REALTIME = """
+    SELECT COALESCE(SUM(in_count - out_count), 0)
+    FROM event_minute_counts
+    WHERE date = ?
+"""
+
+_SQL_EVENT_ROWS = """
+    SELECT timestamp AS event_time,
+           CASE direction WHEN 'in' THEN 'IN' WHEN 'out' THEN 'OUT' ELSE direction END AS direction,
+           COALESCE(camera_id, '') AS camera_id
+    FROM events
+    WHERE timestamp >= ? AND timestamp < ?
+    ORDER BY timestamp ASC
+"""
+
+_SQL_EVENT_COUNT = """
+    SELECT COUNT(*)
+    FROM events
+    WHERE timestamp >= ? AND timestamp < ?
+"""
+
+_SQL_LAST_EVENT_TIME = """
+    SELECT MAX(timestamp)
+    FROM events
+    WHERE timestamp >= ? AND timestamp < ?
+"""
+
+_SQL_MP = """
+    SELECT start_time, end_time, duration_minutes, session, alert_sent
+    FROM missing_periods
+    WHERE start_time >= ? AND start_time < ?
+    ORDER BY start_time ASC
+"""
+
+_SQL_MP_DURATIONS = """
+    SELECT start_time, duration_minutes
+    FROM missing_periods
+    WHERE start_time >= ? AND start_time < ?
+    ORDER BY start_time ASC
+"""
+
+_SQL_ALERTS = """
+    SELECT alert_time, expected_total, current_total, missing
+    FROM alert_logs
+    WHERE alert_time >= ? AND alert_time < ?
+    ORDER BY alert_time ASC
+"""
+
+_SQL_DAILY_STATE = """
+    SELECT total_morning, realtime_in, realtime_out, is_frozen, updated_at
+    FROM daily_state
+    WHERE date = ?
+"""
+
+# Cheap per-table fingerprints of one day's rows: any insert, delete, or closing of a
+# missing period changes at least one of these values
+_SQL_EVENTS_SIGNATURE = """
+    SELECT COUNT(*), COALESCE(MAX(timestamp), '')
+    FROM events
+    WHERE timestamp >= ? AND timestamp < ?
+"""
+
+_SQL_MP_SIGNATURE = """
+    SELECT COUNT(*), COUNT(end_time), COALESCE(MAX(start_time), ''), COALESCE(SUM(duration_minutes), 0)
+    FROM missing_periods
+    WHERE start_time >= ? AND start_time < ?
+"""
+
+_SQL_ALERTS_SIGNATURE = """
+    SELECT COUNT(*), COALESCE(MAX(alert_time), '')
+    FROM alert_logs
+    WHERE alert_time >= ? AND alert_time < ?
+"""
+
+
+def configure_read_connection(conn: sqlite3.Connection) -> None:
+    """
+    Apply read-optimized pragmas to a connection used only for export queries.
+    
+    Call once right after connecting. WAL lets the export read while the counter
+    keeps writing; mmap and a 64 MB page cache cut read syscalls; query_only
+    guards against accidental writes through this connection.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA query_only=1")
+
+
+def _day_bounds(target_date: str) -> Tuple[str, str]:
+    """
+    Half-open [target_date, next day) bounds for ISO timestamp columns.
+    
+    ISO-8601 strings sort chronologically, so `col >= lo AND col < hi` selects
+    the day while still letting SQLite use an index on the column (unlike
+    substr(col, 1, 10) = ?).
+    """
+    next_day = datetime.strptime(target_date, "%Y-%m-%d") + timedelta(days=1)
+    return target_date, next_day.strftime("%Y-%m-%d")
+
 
 def get_total_morning(cursor: sqlite3.Cursor, target_date: str, morning_start: str, morning_end: str) -> int:
     """
@@ -29,28 +151,20 @@ def get_total_morning(cursor: sqlite3.Cursor, target_date: str, morning_start: s
     try:
         start_hour, start_min = map(int, morning_start.split(':'))
         end_hour, end_min = map(int, morning_end.split(':'))
-        start_minutes = start_hour * 60 + start_min
-        end_minutes = end_hour * 60 + end_min
-        
-        # Handle ISO 8601 timestamp format with timezone (e.g., '2026-01-07T11:05:01+07:00')
-        # Calculate IN - OUT (not just IN count)
-        cursor.execute("""
-            SELECT 
-                SUM(CASE WHEN UPPER(direction) = 'IN' THEN 1 ELSE 0 END) as in_count,
-                SUM(CASE WHEN UPPER(direction) = 'OUT' THEN 1 ELSE 0 END) as out_count
-            FROM events
-            WHERE substr(timestamp, 1, 10) = ?
-              AND CAST(substr(timestamp, 12, 2) AS INTEGER) * 60 + CAST(substr(timestamp, 15, 2) AS INTEGER) >= ?
-              AND CAST(substr(timestamp, 12, 2) AS INTEGER) * 60 + CAST(substr(timestamp, 15, 2) AS INTEGER) < ?
-        """, (target_date, start_minutes, end_minutes))
         
-        result = cursor.fetchone()
-        in_count = result[0] if result and result[0] else 0
-        out_count = result[1] if result and result[1] else 0
+        start_hhmm = f"{start_hour:02d}:{start_min:02d}"
+        end_hhmm = f"{end_hour:02d}:{end_min:02d}"
         
-        total_morning = in_count - out_count
+        # Calculate IN - OUT (not just IN count)
+        try:
+            cursor.execute(_SQL_TOTAL_MORNING, (target_date, start_hhmm, end_hhmm))
+        except sqlite3.OperationalError:
+            # No rollup table yet: ISO 8601 timestamps with timezone (e.g., '2026-01-07T11:05:01+07:00')
+            # make [date T HH:MM, date T HH:MM) a lexicographic range, so idx_events_timestamp applies
+            cursor.execute(_SQL_IN_OUT, (f"{target_date}T{start_hhmm}", f"{target_date}T{end_hhmm}"))
+        total_morning = cursor.fetchone()[0]
         
-        logger.debug(f"Total Morning for {target_date}: {total_morning} (IN: {in_count} - OUT: {out_count} between {morning_start}-{morning_end})")
+        logger.debug(f"Total Morning for {target_date}: {total_morning} (IN - OUT between {morning_start}-{morning_end})")
         return total_morning
         
     except Exception as e:
@@ -72,20 +186,14 @@ def get_realtime_count(cursor: sqlite3.Cursor, target_date: str) -> int:
         Realtime count (IN - OUT)
     """
     try:
-        cursor.execute("""
-            SELECT 
-                SUM(CASE WHEN UPPER(direction) = 'IN' THEN 1 ELSE 0 END) as in_count,
-                SUM(CASE WHEN UPPER(direction) = 'OUT' THEN 1 ELSE 0 END) as out_count
-            FROM events
-            WHERE substr(timestamp, 1, 10) = ?
-        """, (target_date,))
-        
-        result = cursor.fetchone()
-        in_count = result[0] if result and result[0] else 0
-        out_count = result[1] if result and result[1] else 0
+        try:
+            cursor.execute(_SQL_REALTIME, (target_date,))
+        except sqlite3.OperationalError:
+            # No rollup table yet: scan the day's events instead
+            cursor.execute(_SQL_IN_OUT, _day_bounds(target_date))
+        realtime = cursor.fetchone()[0]
         
-        realtime = in_count - out_count
-        logger.debug(f"Realtime count for {target_date}: {realtime} (IN: {in_count}, OUT: {out_count})")
+        logger.debug(f"Realtime count for {target_date}: {realtime} (IN - OUT)")
         return realtime
         
     except Exception as e:
@@ -107,12 +215,7 @@ def get_missing_periods(cursor: sqlite3.Cursor, target_date: str, total_morning:
     """
     try:
         # Get missing periods from database
-        cursor.execute("""
-            SELECT start_time, end_time, duration_minutes, session, alert_sent
-            FROM missing_periods
-            WHERE substr(start_time, 1, 10) = ?
-            ORDER BY start_time ASC
-        """, (target_date,))
+        cursor.execute(_SQL_MP, _day_bounds(target_date))
         
         rows = cursor.fetchall()
         
@@ -133,7 +236,40 @@ def get_missing_periods(cursor: sqlite3.Cursor, target_date: str, total_morning:
         return []
 
 
-def get_alerts(cursor: sqlite3.Cursor, target_date: str, total_morning: int = 0) -> List[Dict]:
+def _get_missing_period_durations(cursor: sqlite3.Cursor, target_date: str) -> List[Tuple[str, int]]:
+    """(start_time, duration_minutes) pairs for the day - all the alert fallback reads."""
+    try:
+        cursor.execute(_SQL_MP_DURATIONS, _day_bounds(target_date))
+        return [(start_time, duration_minutes or 0) for start_time, duration_minutes in cursor.fetchall()]
+    except sqlite3.Error as e:
+        logger.warning(f"Error getting missing periods: {e}")
+        return []
+
+
+# Set once the alert_logs table has been seen. Storage._init_schema creates it, and it
+# is never dropped, so a positive probe stays valid; a negative one is re-checked.
+_alert_logs_exists_cache: Optional[bool] = None
+
+
+def _alert_logs_exists(cursor: sqlite3.Cursor) -> bool:
+    """Return True if the alert_logs table exists, probing sqlite_master at most once."""
+    global _alert_logs_exists_cache
+    if _alert_logs_exists_cache:
+        return True
+    cursor.execute("""
+        SELECT name FROM sqlite_master 
+        WHERE type='table' AND name='alert_logs'
+    """)
+    _alert_logs_exists_cache = cursor.fetchone() is not None
+    return _alert_logs_exists_cache
+
+
+def get_alerts(
+    cursor: sqlite3.Cursor,
+    target_date: str,
+    total_morning: int = 0,
+    missing_periods: Optional[List[Dict]] = None
+) -> List[Dict]:
     """
     Get ALERTS from alert_logs table.
     If no alerts exist, create alerts from missing_periods (for Excel export).
@@ -142,26 +278,18 @@ def get_alerts(cursor: sqlite3.Cursor, target_date: str, total_morning: int = 0)
         cursor: Database cursor
         target_date: Date in YYYY-MM-DD format
         total_morning: Total morning count (for creating alerts from missing_periods)
+        missing_periods: Rows already returned by get_missing_periods, reused by the
+            fallback instead of querying missing_periods again
     
     Returns:
         List of alert dicts with: alert_time, total_morning, realtime, missing
     """
     try:
-        # Check if alert_logs table exists
-        cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='alert_logs'
-        """)
-        if not cursor.fetchone():
+        if not _alert_logs_exists(cursor):
             logger.debug("alert_logs table does not exist")
             return []
         
-        cursor.execute("""
-            SELECT alert_time, expected_total, current_total, missing
-            FROM alert_logs
-            WHERE substr(alert_time, 1, 10) = ?
-            ORDER BY alert_time ASC
-        """, (target_date,))
+        cursor.execute(_SQL_ALERTS, _day_bounds(target_date))
         
         alerts = []
         for row in cursor.fetchall():
@@ -175,15 +303,16 @@ def get_alerts(cursor: sqlite3.Cursor, target_date: str, total_morning: int = 0)
         
         # If no alerts but there are missing_periods, create alerts from missing_periods
         if not alerts:
-            missing_periods = get_missing_periods(cursor, target_date, total_morning)
+            if missing_periods is not None:
+                missing_periods = [(p['start_time'], p['duration_minutes']) for p in missing_periods]
+            else:
+                missing_periods = _get_missing_period_durations(cursor, target_date)
             if missing_periods:
                 logger.info(f"No alerts in alert_logs, creating {len(missing_periods)} alerts from missing_periods")
-                for period in missing_periods:
+                for alert_time, duration_minutes in missing_periods:
                     # Use start_time as alert_time
-                    alert_time = period.get('start_time', '')
                     if alert_time:
                         # Calculate missing from period duration (estimate)
-                        duration_minutes = period.get('duration_minutes', 0)
                         # Estimate missing count (assume 1 person per 30 minutes)
                         estimated_missing = max(1, duration_minutes // 30) if duration_minutes >= 30 else 0
                         
@@ -203,33 +332,24 @@ def get_alerts(cursor: sqlite3.Cursor, target_date: str, total_morning: int = 0)
         return []
 
 
-def get_events(cursor: sqlite3.Cursor, target_date: str) -> List[Dict]:
+def get_events(cursor: sqlite3.Cursor, target_date: str) -> List[sqlite3.Row]:
     """
     Get all EVENTS for the day.
     
+    Rows are sqlite3.Row objects (C-level mapping views) rather than dicts built
+    in Python; index them by name exactly as before.
+    
     Args:
         cursor: Database cursor
         target_date: Date in YYYY-MM-DD format
     
     Returns:
-        List of event dicts with: event_time, direction, camera_id
+        List of event rows with: event_time, direction, camera_id
     """
+    previous_factory = cursor.row_factory
     try:
-        cursor.execute("""
-            SELECT timestamp, direction, camera_id
-            FROM events
-            WHERE substr(timestamp, 1, 10) = ?
-            ORDER BY timestamp ASC
-        """, (target_date,))
-        
-        events = []
-        for row in cursor.fetchall():
-            event_time, direction, camera_id = row
-            events.append({
-                'event_time': event_time,
-                'direction': direction.upper(),  # Normalize to uppercase
-                'camera_id': camera_id or ''
-            })
+        cursor.row_factory = sqlite3.Row
+        events = cursor.execute(_SQL_EVENT_ROWS, _day_bounds(target_date)).fetchall()
         
         logger.debug(f"Found {len(events)} events for {target_date}")
         return events
@@ -237,6 +357,77 @@ def get_events(cursor: sqlite3.Cursor, target_date: str) -> List[Dict]:
     except Exception as e:
         logger.error(f"Error getting events: {e}", exc_info=True)
         return []
+    finally:
+        cursor.row_factory = previous_factory
+
+
+def iter_events(cursor: sqlite3.Cursor, target_date: str) -> Iterator[Tuple[str, str, str]]:
+    """
+    Yield the day's EVENTS as (event_time, direction, camera_id) tuples.
+    
+    Rows are fetched in batches and handed over as sqlite3 returns them, so a
+    writer can consume them without any intermediate list or dict. The cursor is
+    busy until the iterator is exhausted; give it one of its own.
+    
+    Args:
+        cursor: Database cursor (dedicated to this iterator)
+        target_date: Date in YYYY-MM-DD format
+    """
+    cursor.arraysize = 4096
+    cursor.execute(_SQL_EVENT_ROWS, _day_bounds(target_date))
+    while True:
+        rows = cursor.fetchmany()
+        if not rows:
+            break
+        yield from rows
+
+
+def get_event_count(cursor: sqlite3.Cursor, target_date: str) -> int:
+    """Get the number of EVENTS for the day (an index-only count)."""
+    cursor.execute(_SQL_EVENT_COUNT, _day_bounds(target_date))
+    return cursor.fetchone()[0]
+
+
+def get_last_event_time(cursor: sqlite3.Cursor, target_date: str) -> Optional[str]:
+    """
+    Get the timestamp of the day's last event without fetching the events.
+    
+    MAX() over the timestamp range is answered from idx_events_timestamp.
+    
+    Args:
+        cursor: Database cursor
+        target_date: Date in YYYY-MM-DD format
+    
+    Returns:
+        Last event timestamp, or None if there were no events
+    """
+    try:
+        cursor.execute(_SQL_LAST_EVENT_TIME, _day_bounds(target_date))
+        return cursor.fetchone()[0]
+    except sqlite3.Error as e:
+        logger.warning(f"Error getting last event time: {e}")
+        return None
+
+
+def get_export_signature(cursor: sqlite3.Cursor, target_date: str) -> Tuple:
+    """
+    Return a tuple that changes whenever the exported data for target_date changes.
+    
+    Built from index-backed aggregates over events, missing_periods and alert_logs
+    plus the day's daily_state row, so it costs a few lookups instead of a full read.
+    """
+    day_start, next_day = _day_bounds(target_date)
+    cursor.execute(_SQL_EVENTS_SIGNATURE, (day_start, next_day))
+    signature = tuple(cursor.fetchone())
+    cursor.execute(_SQL_MP_SIGNATURE, (day_start, next_day))
+    signature += tuple(cursor.fetchone())
+    if _alert_logs_exists(cursor):
+        cursor.execute(_SQL_ALERTS_SIGNATURE, (day_start, next_day))
+        signature += tuple(cursor.fetchone())
+    daily_state = get_daily_state(cursor, target_date)
+    if daily_state:
+        signature += tuple(daily_state.values())
+    return signature
 
 
 def get_daily_state(cursor: sqlite3.Cursor, target_date: str) -> Optional[Dict]:
@@ -251,11 +442,7 @@ def get_daily_state(cursor: sqlite3.Cursor, target_date: str) -> Optional[Dict]:
         Dict with total_morning, realtime_in, realtime_out, is_frozen, or None
     """
     try:
-        cursor.execute("""
-            SELECT total_morning, realtime_in, realtime_out, is_frozen, updated_at
-            FROM daily_state
-            WHERE date = ?
-        """, (target_date,))
+        cursor.execute(_SQL_DAILY_STATE, (target_date,))
         
         row = cursor.fetchone()
         if row:
@@ -284,6 +471,9 @@ def get_all_data_for_date(
     """
     Get all data for a specific date.
     
+    The day's events are not loaded here; read them with get_events or stream
+    them with iter_events.
+    
     CRITICAL: total_morning must be taken from daily_state (frozen value) if available.
     Only calculate from events if daily_state doesn't exist or total_morning is None.
     
@@ -293,12 +483,14 @@ def get_all_data_for_date(
     - missing: int (never negative)
     - missing_periods: List[Dict]
     - alerts: List[Dict]
-    - events: List[Dict]
     - last_updated: str (timestamp of last event or current time)
     """
     # PRIORITY 1: Get from daily_state (frozen value - most accurate)
     daily_state = get_daily_state(cursor, target_date)
     
+    total_morning_from_events = get_total_morning(cursor, target_date, morning_start, morning_end)
+    realtime_from_events = get_realtime_count(cursor, target_date)
+    
     # CRITICAL: Use daily_state.total_morning if it exists AND is_frozen=True
     # BUT: Verify if total_morning=0 but there are events in morning phase (might be wrong if app restarted)
     if daily_state and daily_state.get('is_frozen') and daily_state.get('total_morning') is not None:
@@ -306,7 +498,6 @@ def get_all_data_for_date(
         
         # VERIFY: If total_morning=0 but there are events in morning phase, recalculate (app may have restarted)
         if total_morning_frozen == 0:
-            total_morning_from_events = get_total_morning(cursor, target_date, morning_start, morning_end)
             if total_morning_from_events > 0:
                 # There are events but total_morning=0 - likely app restarted, use calculated value
                 total_morning = total_morning_from_events
@@ -321,7 +512,7 @@ def get_all_data_for_date(
             logger.info(f"Using frozen total_morning from daily_state: {total_morning}")
     else:
         # FALLBACK: Calculate from events (if not frozen yet or doesn't exist)
-        total_morning = get_total_morning(cursor, target_date, morning_start, morning_end)
+        total_morning = total_morning_from_events
         if daily_state and daily_state.get('total_morning') == 0 and not daily_state.get('is_frozen'):
             logger.info(f"Calculated total_morning from events: {total_morning} (daily_state exists but not frozen yet)")
         else:
@@ -338,25 +529,23 @@ def get_all_data_for_date(
         logger.info(f"Using realtime from daily_state: {realtime} (total_morning={total_morning}, realtime_in={daily_state.get('realtime_in', 0)}, realtime_out={daily_state.get('realtime_out', 0)})")
     else:
         # Fallback: Calculate from all events (if total_morning not frozen yet)
-        realtime = get_realtime_count(cursor, target_date)
+        realtime = realtime_from_events
         # Ensure realtime is never negative
         realtime = max(0, realtime)
         logger.info(f"Calculated realtime from events: {realtime}")
     
-    # Calculate missing count: missing = total_morning - realtime
-    missing = total_morning - realtime
-    # Ensure missing is never negative
-    missing = max(0, missing)
+    # Calculate missing count: missing = total_morning - realtime, never negative
+    missing = max(0, total_morning - realtime)
     
     missing_periods = get_missing_periods(cursor, target_date, total_morning)
-    alerts = get_alerts(cursor, target_date, total_morning)  # Pass total_morning to create alerts from missing_periods if needed
-    events = get_events(cursor, target_date)
+    # Reuse the periods loaded above; get_alerts only needs them when alert_logs is empty
+    alerts = get_alerts(cursor, target_date, total_morning, missing_periods=missing_periods)
     
     # Last updated: Use daily_state.updated_at if available, else last event time
     if daily_state and daily_state.get('updated_at'):
         last_updated = daily_state['updated_at']
     else:
-        last_updated = events[-1]['event_time'] if events else datetime.now().isoformat()
+        last_updated = get_last_event_time(cursor, target_date) or datetime.now().isoformat()
     
     return {
         'total_morning': total_morning,
@@ -364,7 +553,6 @@ def get_all_data_for_date(
         'missing': missing,
         'missing_periods': missing_periods,
         'alerts': alerts,
-        'events': events,
         'last_updated': last_updated
     }
 
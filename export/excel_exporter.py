@@ -3,20 +3,77 @@ Excel exporter - 100% database-driven, atomic writes.
 SQLite is the single source of truth.
 """
 
+import hashlib
 import logging
+import os
+import re
+import shutil
 import sqlite3
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
+from xml.sax.saxutils import escape
 
-import pandas as pd
-from openpyxl import load_workbook
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.utils import get_column_letter
 
-from export.db_queries import get_all_data_for_date
+# Optional: xlsxwriter in constant_memory mode streams rows to disk and is faster
+# than openpyxl; the openpyxl write-only path is used when it is not installed
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+from export.db_queries import (
+    get_all_data_for_date, configure_read_connection, iter_events, get_event_count,
+    get_export_signature
+)
 
 logger = logging.getLogger(__name__)
 
+# Header style, built once and shared by every header cell of every export
+_HEADER_FILL = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+_HEADER_FONT = Font(bold=True, color="FFFFFF")
+_HEADER_ALIGN = Alignment(horizontal="center", vertical="center")
+
+# Column widths for the sheets whose values have a fixed format (ISO timestamps with
+# offset, IN/OUT, counts), so their rows are never scanned; SUMMARY is still measured
+_FIXED_WIDTHS = {
+    'EVENTS': [34, 11, 14],
+    'ALERTS': [34, 15, 12, 12],
+    'MISSING_PERIODS': [34, 34, 18, 12],
+}
+
+# Export connections, one per database path, kept open between exports so SQLite's
+# page cache and the read pragmas carry over; _export_lock serializes their use.
+# Each entry remembers the file's (device, inode) so a replaced database is reopened.
+_export_connections: Dict[str, Tuple[Tuple[int, int], sqlite3.Connection]] = {}
+_export_lock = threading.Lock()
+
+
+def _get_export_connection(db_path: str) -> sqlite3.Connection:
+    """Return the cached read-only export connection for db_path, opening it on first use."""
+    st = os.stat(db_path)
+    file_id = (st.st_dev, st.st_ino)
+    with _export_lock:
+        cached = _export_connections.get(db_path)
+        if cached is not None and cached[0] == file_id:
+            return cached[1]
+        if cached is not None:
+            cached[1].close()
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        configure_read_connection(conn)
+        _export_connections[db_path] = (file_id, conn)
+        return conn
+
 
 def export_daily_excel(
     target_date: str,
@@ -44,6 +101,7 @@ def export_daily_excel(
     Returns:
         True if successful, False otherwise
     """
+    temp_file: Optional[Path] = None
     try:
         # Validate inputs
         if not Path(db_path).exists():
@@ -55,174 +113,415 @@ def export_daily_excel(
         output_path.mkdir(parents=True, exist_ok=True)
         
         output_file = output_path / f"people_counter_{target_date}.xlsx"
-        temp_file = output_path / f"people_counter_{target_date}.tmp.xlsx"
-        
-        # Remove temp file if exists (cleanup from previous failed export)
-        if temp_file.exists():
-            try:
-                temp_file.unlink()
-            except Exception as e:
-                logger.warning(f"Could not remove old temp file: {e}")
+        sig_file = signature_file(output_file)
         
         logger.info(f"EXCEL_EXPORT_START: date={target_date}, db={db_path}")
         
-        # Connect to database
-        conn = sqlite3.connect(db_path)
+        # Reuse this database's export connection (pragmas and page cache persist)
+        conn = _get_export_connection(db_path)
+        _export_lock.acquire()  # one export at a time on the shared connection
         cursor = conn.cursor()
         
         try:
-            # Get all data from database
+            # One read transaction: the summary, the events shape and the streamed
+            # EVENTS rows all see the same snapshot even while the counter writes
+            conn.execute("BEGIN")
+            
+            # Nothing changed since the last successful export: keep the existing file
+            signature = _signature(cursor, target_date, morning_start, morning_end)
+            stored_signature, stored_empty = _read_signature(sig_file)
+            if output_file.exists() and stored_signature == signature:
+                logger.info(f"EXCEL_EXPORT_SKIPPED_NOCHANGE: {output_file.name}")
+                return True
+            
+            # Get all data from database; events are streamed into the sheet below
             data = get_all_data_for_date(cursor, target_date, morning_start, morning_end)
+            event_count = get_event_count(cursor, target_date)
             
             logger.info(
                 f"Data retrieved: total_morning={data['total_morning']}, "
                 f"realtime={data['realtime']}, missing={data['missing']}, "
-                f"events={len(data['events'])}, alerts={len(data['alerts'])}, "
+                f"events={event_count}, alerts={len(data['alerts'])}, "
                 f"missing_periods={len(data['missing_periods'])}"
             )
             
-            # Create Excel file in temp location
-            with pd.ExcelWriter(temp_file, engine='openpyxl') as writer:
-                # Sheet 1: SUMMARY
-                summary_data = {
-                    'Field': [
-                        'Date',
-                        'Total Morning',
-                        'Current Realtime',
-                        'Current Missing',
-                        'Last Updated Time'
-                    ],
-                    'Value': [
-                        target_date,
-                        data['total_morning'],
-                        data['realtime'],
-                        data['missing'],
-                        data['last_updated']
-                    ]
-                }
-                df_summary = pd.DataFrame(summary_data)
-                df_summary.to_excel(writer, sheet_name='SUMMARY', index=False)
-                
-                # Sheet 2: MISSING_PERIODS
-                if data['missing_periods']:
-                    missing_periods_data = {
-                        'start_time': [p['start_time'] for p in data['missing_periods']],
-                        'end_time': [p.get('end_time', '') for p in data['missing_periods']],
-                        'duration_minutes': [p.get('duration_minutes', 0) for p in data['missing_periods']],
-                        'session': [p.get('session', '') for p in data['missing_periods']]
-                    }
-                    df_missing = pd.DataFrame(missing_periods_data)
-                else:
-                    df_missing = pd.DataFrame(columns=['start_time', 'end_time', 'duration_minutes', 'session'])
-                df_missing.to_excel(writer, sheet_name='MISSING_PERIODS', index=False)
-                
-                # Sheet 3: ALERTS
-                if data['alerts']:
-                    alerts_data = {
-                        'alert_time': [a['alert_time'] for a in data['alerts']],
-                        'total_morning': [a['total_morning'] for a in data['alerts']],
-                        'realtime': [a['realtime'] for a in data['alerts']],
-                        'missing': [a['missing'] for a in data['alerts']]
-                    }
-                    df_alerts = pd.DataFrame(alerts_data)
-                else:
-                    df_alerts = pd.DataFrame(columns=['alert_time', 'total_morning', 'realtime', 'missing'])
-                df_alerts.to_excel(writer, sheet_name='ALERTS', index=False)
-                
-                # Sheet 4: EVENTS
-                if data['events']:
-                    events_data = {
-                        'event_time': [e['event_time'] for e in data['events']],
-                        'direction': [e['direction'] for e in data['events']],
-                        'camera_id': [e['camera_id'] for e in data['events']]
-                    }
-                    df_events = pd.DataFrame(events_data)
-                else:
-                    df_events = pd.DataFrame(columns=['event_time', 'direction', 'camera_id'])
-                df_events.to_excel(writer, sheet_name='EVENTS', index=False)
+            # Nothing to report and the published workbook was itself built from an
+            # empty day: it already is this export, so only refresh the signature
+            # (the next run then stops at the check above). A workbook built from data
+            # is always rebuilt, so purged dates don't keep showing deleted rows.
+            is_empty = (
+                event_count == 0 and not data['total_morning'] and not data['realtime']
+                and not data['alerts'] and not data['missing_periods']
+            )
+            if is_empty and stored_empty and output_file.exists():
+                logger.info(f"EXCEL_EXPORT_SKIPPED_EMPTY: {output_file.name}")
+                _write_signature(sig_file, signature, empty=True)
+                return True
+            
+            # Create Excel file in a uniquely named temp file next to the output, so
+            # concurrent exporters never share it and os.replace stays on one filesystem
+            with tempfile.NamedTemporaryFile(
+                prefix=f"people_counter_{target_date}.", suffix='.tmp.xlsx', dir=output_path, delete=False
+            ) as tf:
+                temp_file = Path(tf.name)
+            # mkstemp creates the file 0600; the published workbook keeps the usual 0644
+            os.chmod(temp_file, 0o644)
+            # One write-only pass, formatting included
+            write_sheet, save_workbook = _open_workbook(temp_file)
+            
+            # Sheet 1: SUMMARY
+            write_sheet('SUMMARY', ['Field', 'Value'], [
+                ('Date', target_date),
+                ('Total Morning', data['total_morning']),
+                ('Current Realtime', data['realtime']),
+                ('Current Missing', data['missing']),
+                ('Last Updated Time', data['last_updated'])
+            ])
+            
+            # Sheet 2: MISSING_PERIODS
+            write_sheet('MISSING_PERIODS', ['start_time', 'end_time', 'duration_minutes', 'session'], [
+                (p['start_time'], p.get('end_time', ''), p.get('duration_minutes', 0), p.get('session', ''))
+                for p in data['missing_periods']
+            ])
+            
+            # Sheet 3: ALERTS
+            write_sheet('ALERTS', ['alert_time', 'total_morning', 'realtime', 'missing'], [
+                (a['alert_time'], a['total_morning'], a['realtime'], a['missing'])
+                for a in data['alerts']
+            ])
+            
+            # Sheet 4: EVENTS - straight from the cursor, the next batch read while this one is written
+            write_sheet(
+                'EVENTS', ['event_time', 'direction', 'camera_id'], _read_ahead(iter_events(conn.cursor(), target_date)),
+                row_count=event_count
+            )
             
-            # Format Excel file
-            wb = load_workbook(temp_file)
-            _format_excel(wb)
-            wb.save(temp_file)
+            save_workbook()
             
-            # Atomic replace: rename temp file to final file
+            # Atomic replace: readers see either the old file or the new one, never neither
             try:
-                # Try to remove existing file (might fail if open in Excel)
-                if output_file.exists():
-                    output_file.unlink()
-                
-                temp_file.rename(output_file)
+                # Raises PermissionError on Windows if the file is open in Excel
+                os.replace(temp_file, output_file)
+                _fsync_dir(output_path)
+                _write_signature(sig_file, signature, empty=is_empty)
                 
                 logger.info(
                     f"EXCEL_EXPORT_SUCCESS: {output_file.name} "
                     f"(total_morning={data['total_morning']}, realtime={data['realtime']}, "
-                    f"events={len(data['events'])}, alerts={len(data['alerts'])})"
+                    f"events={event_count}, alerts={len(data['alerts'])})"
                 )
                 return True
                 
             except PermissionError:
                 logger.warning(
                     f"EXCEL_EXPORT_SKIPPED: Cannot overwrite {output_file.name} - "
-                    f"file may be open in Excel. Temp file preserved: {temp_file.name}"
+                    "file may be open in Excel"
                 )
-                # Keep temp file for debugging
+                temp_file.unlink(missing_ok=True)
                 return False
             except Exception as e:
                 logger.error(f"EXCEL_EXPORT_ERROR: Failed to rename temp file: {e}")
-                if temp_file.exists():
-                    temp_file.unlink()
+                temp_file.unlink(missing_ok=True)
                 return False
         
         finally:
-            conn.close()
+            # End the read snapshot; the connection stays open for the next export
+            conn.rollback()
+            _export_lock.release()
             
     except sqlite3.Error as e:
         logger.error(f"EXCEL_EXPORT_ERROR: Database error: {e}", exc_info=True)
-        if temp_file.exists():
-            temp_file.unlink()
+        if temp_file is not None:
+            temp_file.unlink(missing_ok=True)
         return False
     except Exception as e:
         logger.error(f"EXCEL_EXPORT_ERROR: {e}", exc_info=True)
-        if temp_file.exists():
-            temp_file.unlink()
+        if temp_file is not None:
+            temp_file.unlink(missing_ok=True)
         return False
 
 
-def _format_excel(wb):
-    """Apply formatting to Excel workbook."""
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
+def _fsync_dir(path: Path) -> None:
+    """Flush a directory entry (the rename just made) to disk; no-op where unsupported."""
+    if os.name != 'posix':
+        return
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        logger.debug(f"Could not fsync directory {path}: {e}")
+
+
+def _signature(cursor: sqlite3.Cursor, target_date: str, morning_start: str, morning_end: str) -> str:
+    """Hash the day's data fingerprint together with the morning window used for the summary."""
+    parts = (morning_start, morning_end) + get_export_signature(cursor, target_date)
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def signature_file(output_file: Path) -> Path:
+    """
+    Return the sidecar next to a people_counter_YYYY-MM-DD.xlsx workbook that holds
+    the signature of its last export. Retention deletes it together with the workbook.
+    """
+    target_date = output_file.stem[len("people_counter_"):]
+    return output_file.with_name(f".{target_date}.sig")
+
+
+def _read_signature(sig_file: Path) -> Tuple[Optional[str], bool]:
+    """
+    Return (signature, empty) stored by the last successful export; empty is True
+    if that workbook was built from a day with nothing to report. (None, False)
+    if there is no readable sidecar.
+    """
+    try:
+        fields = sig_file.read_text(encoding='utf-8').split()
+    except OSError:
+        return None, False
+    if not fields:
+        return None, False
+    return fields[0], fields[1:] == ['empty']
+
+
+def _write_signature(sig_file: Path, signature: str, empty: bool = False) -> None:
+    """Store the signature of the export that was just published; failure only costs a rebuild."""
+    try:
+        sig_file.write_text(f"{signature} empty" if empty else signature, encoding='utf-8')
+    except OSError as e:
+        logger.warning(f"Could not write export signature {sig_file.name}: {e}")
+
+
+def _read_ahead(rows: Iterable[tuple], batch_size: int = 4096) -> Iterable[tuple]:
+    """
+    Yield rows, fetching the next batch on a worker thread while the current one is written.
     
-    for sheet_name in ['SUMMARY', 'MISSING_PERIODS', 'ALERTS', 'EVENTS']:
-        if sheet_name not in wb.sheetnames:
-            continue
-        
-        ws = wb[sheet_name]
-        
-        # Format header row
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-        
-        # Freeze header row
-        ws.freeze_panes = 'A2'
+    sqlite3 releases the GIL while stepping a query, so reading overlaps with sheet
+    writing. Batches are fetched one at a time, so rows is never used concurrently.
+    """
+    def next_batch():
+        return list(islice(rows, batch_size))
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = executor.submit(next_batch)
+        while True:
+            batch = pending.result()
+            if not batch:
+                return
+            pending = executor.submit(next_batch)
+            yield from batch
+
+
+def _open_workbook(temp_file: Path) -> Tuple[Callable, Callable[[], None]]:
+    """
+    Open a streaming workbook at temp_file.
+    
+    Returns (write_sheet, save): write_sheet(title, headers, rows, row_count=None,
+    max_lengths=None) appends one formatted sheet, save() finishes the file.
+    Uses xlsxwriter (constant_memory) when available, else openpyxl write-only.
+    With openpyxl, a streamed sheet (row_count given) is saved with its header
+    only and its rows are spliced into the sheet XML by save(), skipping the
+    per-cell objects openpyxl would build for them.
+    """
+    if XLSXWRITER_AVAILABLE:
+        workbook = xlsxwriter.Workbook(str(temp_file), {
+            'constant_memory': True,
+            # Write every value as-is, like openpyxl: no formula/URL/number sniffing
+            'strings_to_formulas': False,
+            'strings_to_urls': False,
+        })
+        header_format = workbook.add_format({
+            'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#366092',
+            'align': 'center', 'valign': 'vcenter',
+        })
         
-        # Enable filter
-        if ws.max_row > 1:
-            ws.auto_filter.ref = ws.dimensions
+        def write_sheet(title, headers, rows, row_count=None, max_lengths=None):
+            _write_sheet_xlsxwriter(workbook, header_format, title, headers, rows, row_count, max_lengths)
         
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if cell.value and len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
+        return write_sheet, workbook.close
+    
+    wb = Workbook(write_only=True)
+    streamed = []  # (sheet part name, rows, column count) filled in after wb.save
+    
+    def write_sheet(title, headers, rows, row_count=None, max_lengths=None):
+        if row_count is None:
+            _write_sheet(wb, title, headers, rows, row_count, max_lengths)
+            return
+        _write_sheet(wb, title, headers, [], row_count, max_lengths)
+        streamed.append((f"xl/worksheets/sheet{len(wb.worksheets)}.xml", rows, len(headers)))
+    
+    def save():
+        wb.save(temp_file)
+        for part_name, rows, column_count in streamed:
+            _splice_sheet_rows(temp_file, part_name, rows, column_count)
+    
+    return write_sheet, save
+
+
+def _splice_sheet_rows(xlsx_file: Path, part_name: str, rows: Iterable[tuple], column_count: int) -> None:
+    """
+    Rewrite xlsx_file with rows appended after the header row of sheet part_name.
+    
+    The sheet openpyxl saved (header, freeze pane, widths, autofilter) is kept
+    as-is apart from its <dimension>, which is set to the real used range; the
+    rows are written straight out as inline-string XML. Every other part is
+    copied over unchanged.
+    """
+    spliced_file = xlsx_file.with_name(xlsx_file.name + '.part')
+    try:
+        with zipfile.ZipFile(xlsx_file) as src, \
+                zipfile.ZipFile(spliced_file, 'w', zipfile.ZIP_DEFLATED) as dst:
+            for item in src.infolist():
+                if item.filename != part_name:
+                    dst.writestr(item, src.read(item.filename))
+                    continue
+                head, tail = src.read(part_name).decode('utf-8').split('</sheetData>', 1)
+                # Rows go to a scratch file first: the dimension ahead of them needs their count
+                with tempfile.TemporaryFile() as row_xml:
+                    last_row = 1
+                    for last_row, row in enumerate(rows, start=2):
+                        row_xml.write(_row_xml(last_row, row).encode('utf-8'))
+                    head = _with_dimension(head, f"A1:{get_column_letter(column_count)}{last_row}")
+                    row_xml.seek(0)
+                    with dst.open(part_name, 'w') as out:
+                        out.write(head.encode('utf-8'))
+                        shutil.copyfileobj(row_xml, out)
+                        out.write(('</sheetData>' + tail).encode('utf-8'))
+        os.replace(spliced_file, xlsx_file)
+    finally:
+        if spliced_file.exists():
+            spliced_file.unlink()
+
+
+_DIMENSION_RE = re.compile(r'<dimension\b[^>]*/>')
+
 
+def _with_dimension(sheet_head: str, ref: str) -> str:
+    """Set the sheet's <dimension> (used range), adding it where the schema puts it if missing."""
+    dimension = f'<dimension ref="{ref}"/>'
+    if _DIMENSION_RE.search(sheet_head):
+        return _DIMENSION_RE.sub(dimension, sheet_head, count=1)
+    # <dimension> follows <sheetPr> when there is one, else opens the worksheet
+    if '</sheetPr>' in sheet_head:
+        return sheet_head.replace('</sheetPr>', '</sheetPr>' + dimension, 1)
+    if '<sheetViews>' in sheet_head:
+        return sheet_head.replace('<sheetViews>', dimension + '<sheetViews>', 1)
+    return re.sub(r'(<worksheet\b[^>]*>)', lambda m: m.group(1) + dimension, sheet_head, count=1)
+
+# Existing _xHHHH_ sequences, and characters XML 1.0 cannot carry: both are written
+# as _xHHHH_ escapes (the OOXML convention, as xlsxwriter does), so Excel and
+# openpyxl read the original text back
+_ESCAPED_RE = re.compile(r'_x[0-9A-Fa-f]{4}_')
+_ILLEGAL_XML_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+
+def _cell_text(value: str) -> str:
+    """XML text for an inline string cell: OOXML-escaped illegal characters, then XML-escaped."""
+    value = _ESCAPED_RE.sub(lambda m: '_x005F' + m.group(0), value)
+    value = _ILLEGAL_XML_RE.sub(lambda m: f'_x{ord(m.group(0)):04X}_', value)
+    return escape(value)
+
+
+def _row_xml(row_idx: int, row: tuple) -> str:
+    """One <row> of sheet XML; strings become inline strings, empty values are left out."""
+    cells = []
+    for col_idx, value in enumerate(row, start=1):
+        if value is None or value == '':
+            continue
+        ref = f"{get_column_letter(col_idx)}{row_idx}"
+        if isinstance(value, str):
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{_cell_text(value)}</t></is></c>')
+        else:
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+    return f'<row r="{row_idx}">{"".join(cells)}</row>'
+
+
+def _measure_rows(
+    title: str,
+    headers: List[str],
+    rows: Iterable[tuple],
+    row_count: Optional[int],
+    max_lengths: Optional[List[int]]
+) -> Tuple[int, List[int]]:
+    """Row count and per-column width (header included, capped at 50) for a sheet."""
+    if row_count is None:
+        row_count = len(rows)
+    if title in _FIXED_WIDTHS:
+        return row_count, _FIXED_WIDTHS[title]
+    if max_lengths is None:
+        # Column-wise over the source tuples; empty values (None, '', 0) never widen a column
+        columns = zip(*rows) if rows else [()] * len(headers)
+        max_lengths = [max(map(len, map(str, filter(None, column))), default=0) for column in columns]
+    widths = [min(max(len(header), max_length) + 2, 50) for header, max_length in zip(headers, max_lengths)]
+    return row_count, widths
+
+
+def _write_sheet_xlsxwriter(
+    workbook,
+    header_format,
+    title: str,
+    headers: List[str],
+    rows: Iterable[tuple],
+    row_count: Optional[int] = None,
+    max_lengths: Optional[List[int]] = None
+):
+    """xlsxwriter counterpart of _write_sheet (constant_memory: rows strictly in order)."""
+    row_count, widths = _measure_rows(title, headers, rows, row_count, max_lengths)
+    ws = workbook.add_worksheet(title)
+    
+    ws.freeze_panes(1, 0)
+    if row_count:
+        ws.autofilter(0, 0, row_count, len(headers) - 1)
+    for col_idx, width in enumerate(widths):
+        ws.set_column(col_idx, col_idx, width)
+    
+    ws.write_row(0, 0, headers, header_format)
+    for row_idx, row in enumerate(rows, 1):
+        ws.write_row(row_idx, 0, row)
+
+
+def _write_sheet(
+    wb: Workbook,
+    title: str,
+    headers: List[str],
+    rows: Iterable[tuple],
+    row_count: Optional[int] = None,
+    max_lengths: Optional[List[int]] = None
+):
+    """
+    Append a sheet to a write-only workbook: styled header, frozen header row,
+    filter over the data and column widths fitted to the content.
+    
+    Write-only sheets cannot be revisited, so everything that used to be applied
+    by reloading the saved file is set here before the rows are streamed out.
+    rows may be a one-shot iterator if row_count is given and the widths need no
+    scan (a _FIXED_WIDTHS sheet, or max_lengths given); otherwise it must be a
+    list and both are measured from it.
+    """
+    row_count, widths = _measure_rows(title, headers, rows, row_count, max_lengths)
+    ws = wb.create_sheet(title)
+    
+    # Freeze header row
+    ws.freeze_panes = 'A2'
+    
+    # Enable filter
+    if row_count:
+        ws.auto_filter.ref = f"A1:{get_column_letter(len(headers))}{row_count + 1}"
+    
+    # Auto-adjust column widths from the values about to be written
+    for col_idx, width in enumerate(widths):
+        ws.column_dimensions[get_column_letter(col_idx + 1)].width = width
+    
+    # Format header row
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.fill = _HEADER_FILL
+        cell.font = _HEADER_FONT
+        cell.alignment = _HEADER_ALIGN
+        header_cells.append(cell)
+    ws.append(header_cells)
+    
+    for row in rows:
+        ws.append(row)
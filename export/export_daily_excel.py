@@ -1,44 +1,86 @@
 """Export daily Excel report from SQLite database."""
 
+import csv
+import os
+import re
 import sqlite3
 import sys
 from datetime import datetime, date
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Iterator, Optional, List, Tuple
 
 try:
     import pandas as pd
-    from openpyxl import load_workbook
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
     from openpyxl.styles import Font, Alignment, PatternFill
+    from openpyxl.utils import get_column_letter
     from openpyxl.utils.dataframe import dataframe_to_rows
 except ImportError:
     print("Error: Required libraries not found. Please install:")
     print("  pip install pandas openpyxl")
     sys.exit(1)
 
+# Optional: xlsxwriter is the faster writer; without it the workbook is streamed
+# through openpyxl's write-only mode (which uses lxml when it is installed)
+try:
+    import xlsxwriter  # noqa: F401
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
 
-def create_alert_logs_table_if_not_exists(cursor: sqlite3.Cursor):
-    """Create alert_logs table if it doesn't exist."""
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS alert_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            alert_time TEXT NOT NULL,
-            expected_total INTEGER NOT NULL,
-            current_total INTEGER NOT NULL,
-            missing INTEGER NOT NULL,
-            created_at TEXT NOT NULL DEFAULT (datetime('now'))
-        )
+# Optional: pyarrow backs the Parquet events output (--format parquet/all)
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+HEADER_COLOR = "366092"
+EVENTS_HEADERS = ['Time', 'Direction', 'Camera']
+# xlsx: the workbook only; csv/parquet: the EVENTS table only, in that format; all: every output
+OUTPUT_FORMATS = ('xlsx', 'csv', 'parquet', 'all')
+
+
+# Tables the report reads; the app's Storage creates them on startup
+REPORT_TABLES = ('alert_logs', 'people_events', 'daily_summary', 'daily_state')
+
+
+def connect_read_only(db_path: str) -> sqlite3.Connection:
+    """Open the database read-only with pragmas suited to the export's scans."""
+    conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+    # Autocommit: transactions are opened explicitly with BEGIN
+    conn.isolation_level = None
+    conn.executescript("""
+        PRAGMA mmap_size=268435456;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-65536;
+        PRAGMA query_only=1;
     """)
+    return conn
+
 
+def has_rows_for_date(conn: sqlite3.Connection, target_date: str, has_old_events: bool) -> bool:
+    """Check in one query whether any table the report reads has a row for the date."""
+    probes = [
+        "EXISTS(SELECT 1 FROM daily_state WHERE date = :d)",
+        "EXISTS(SELECT 1 FROM daily_summary WHERE date = :d)",
+        "EXISTS(SELECT 1 FROM alert_logs WHERE date(alert_time) = :d)",
+        "EXISTS(SELECT 1 FROM people_events WHERE date(event_time) = :d)",
+    ]
+    if has_old_events:
+        probes.append("EXISTS(SELECT 1 FROM events WHERE date(timestamp) = :d)")
+    row = conn.execute(f"SELECT {' OR '.join(probes)}", {'d': target_date}).fetchone()
+    return bool(row[0])
 
-def get_daily_summary(cursor: sqlite3.Cursor, target_date: str) -> Optional[dict]:
+
+def get_daily_summary(conn: sqlite3.Connection, target_date: str) -> Optional[dict]:
     """Get daily summary for a specific date."""
-    cursor.execute("""
+    row = conn.execute("""
         SELECT date, total_morning, updated_at
         FROM daily_summary
         WHERE date = ?
-    """, (target_date,))
-    row = cursor.fetchone()
+    """, (target_date,)).fetchone()
     
     if row:
         return {
@@ -49,14 +91,13 @@ def get_daily_summary(cursor: sqlite3.Cursor, target_date: str) -> Optional[dict
     return None
 
 
-def get_daily_state(cursor: sqlite3.Cursor, target_date: str) -> Optional[dict]:
+def get_daily_state(conn: sqlite3.Connection, target_date: str) -> Optional[dict]:
     """Get daily state for a specific date."""
-    cursor.execute("""
+    row = conn.execute("""
         SELECT date, total_morning, realtime_in, realtime_out, updated_at
         FROM daily_state
         WHERE date = ?
-    """, (target_date,))
-    row = cursor.fetchone()
+    """, (target_date,)).fetchone()
     
     if row:
         return {
@@ -69,228 +110,346 @@ def get_daily_state(cursor: sqlite3.Cursor, target_date: str) -> Optional[dict]:
     return None
 
 
-def get_alerts_for_date(cursor: sqlite3.Cursor, target_date: str) -> List[dict]:
-    """Get alerts for a specific date."""
+def get_alerts_for_date(conn: sqlite3.Connection, target_date: str) -> 'pd.DataFrame':
+    """
+    Get alerts for a specific date as a DataFrame.
+    
+    Columns: alert_time (ISO string), expected_total, current_total, missing.
+    """
     # Filter alerts by date (assuming alert_time is in ISO format)
-    cursor.execute("""
+    return pd.read_sql_query("""
         SELECT alert_time, expected_total, current_total, missing
         FROM alert_logs
         WHERE date(alert_time) = ?
         ORDER BY alert_time ASC
-    """, (target_date,))
-    
-    alerts = []
-    for row in cursor.fetchall():
-        alerts.append({
-            'alert_time': row[0],
-            'expected_total': row[1],
-            'current_total': row[2],
-            'missing': row[3]
-        })
-    return alerts
+    """, conn, params=(target_date,))
 
 
-def calculate_missing_periods_with_duration(alerts: List[dict]) -> List[dict]:
+def calculate_missing_periods_with_duration(alerts: 'pd.DataFrame') -> List[dict]:
     """
     Calculate missing periods with start time, end time, and duration.
     Groups consecutive alerts into periods.
+    
+    An alert extends the current period when it comes within 30 minutes of the
+    previous alert and reports the same missing count. Alert times are parsed
+    in one vectorized pass; alerts whose time cannot be parsed are skipped.
     """
-    if not alerts:
+    if alerts.empty:
         return []
     
-    periods = []
-    current_period = None
+    df = alerts.assign(
+        alert_dt=pd.to_datetime(alerts['alert_time'], utc=True, format='ISO8601', errors='coerce')
+    )
+    df = df[df['alert_dt'].notna()]
+    if df.empty:
+        return []
     
-    for alert in alerts:
-        try:
-            alert_dt = datetime.fromisoformat(alert['alert_time'].replace('Z', '+00:00'))
-        except:
-            continue
-        
-        if current_period is None:
-            # Start new period
-            current_period = {
-                'start_time': alert_dt,
-                'end_time': alert_dt,
-                'missing': alert['missing'],
-                'expected': alert['expected_total'],
-                'current': alert['current_total']
-            }
-        else:
-            # Check if this alert is within 30 minutes of the previous one (same period)
-            time_diff = (alert_dt - current_period['end_time']).total_seconds() / 60  # minutes
-            
-            if time_diff <= 30 and alert['missing'] == current_period['missing']:
-                # Extend current period
-                current_period['end_time'] = alert_dt
-            else:
-                # Save current period and start new one
-                duration = (current_period['end_time'] - current_period['start_time']).total_seconds() / 60
-                periods.append({
-                    'start_time': current_period['start_time'],
-                    'end_time': current_period['end_time'],
-                    'duration_minutes': duration,
-                    'missing': current_period['missing'],
-                    'expected': current_period['expected'],
-                    'current': current_period['current']
-                })
-                current_period = {
-                    'start_time': alert_dt,
-                    'end_time': alert_dt,
-                    'missing': alert['missing'],
-                    'expected': alert['expected_total'],
-                    'current': alert['current_total']
-                }
-    
-    # Save last period
-    if current_period:
-        duration = (current_period['end_time'] - current_period['start_time']).total_seconds() / 60
+    # A new period starts after a gap of more than 30 minutes or when missing changes
+    gap_minutes = df['alert_dt'].diff().dt.total_seconds() / 60
+    new_period = (gap_minutes > 30) | (df['missing'] != df['missing'].shift())
+    grouped = df.groupby(new_period.cumsum(), sort=False).agg(
+        start_time=('alert_time', 'first'),
+        end_time=('alert_time', 'last'),
+        start_dt=('alert_dt', 'first'),
+        end_dt=('alert_dt', 'last'),
+        missing=('missing', 'first'),
+        expected=('expected_total', 'first'),
+        current=('current_total', 'first')
+    )
+    
+    # Only the period boundaries are re-parsed, keeping each alert's own UTC offset for display
+    periods = []
+    for row in grouped.itertuples(index=False):
         periods.append({
-            'start_time': current_period['start_time'],
-            'end_time': current_period['end_time'],
-            'duration_minutes': duration,
-            'missing': current_period['missing'],
-            'expected': current_period['expected'],
-            'current': current_period['current']
+            'start_time': parse_event_time(row.start_time),
+            'end_time': parse_event_time(row.end_time),
+            'duration_minutes': (row.end_dt - row.start_dt).total_seconds() / 60,
+            'missing': row.missing,
+            'expected': row.expected,
+            'current': row.current
         })
     
     return periods
 
 
-def format_missing_periods(alerts: List[dict]) -> str:
-    """Format alerts into missing periods string."""
-    if not alerts:
+def format_missing_periods(alerts: 'pd.DataFrame') -> str:
+    """Format alerts (as returned by get_alerts_for_date) into missing periods string."""
+    if alerts.empty:
         return "None"
     
-    periods = []
-    for alert in alerts:
-        # Extract time from ISO timestamp
-        try:
-            dt = datetime.fromisoformat(alert['alert_time'].replace('Z', '+00:00'))
-            time_str = dt.strftime('%H:%M')
-        except:
-            time_str = alert['alert_time'][:5] if len(alert['alert_time']) >= 5 else alert['alert_time']
-        
-        missing = alert['missing']
-        periods.append(f"{time_str} (-{missing})")
+    # Extract time from ISO timestamp; fall back to the first 5 characters
+    alert_times = alerts['alert_time']
+    if alert_times.str.match(ISO_SECONDS_PATTERN).fillna(False).all():
+        time_str = alert_times.str[11:16]
+    else:
+        time_str = parse_wall_clock(alert_times).dt.strftime('%H:%M')
+        time_str = time_str.fillna(alert_times.str[:5])
     
-    return ", ".join(periods)
+    return ", ".join(time_str + " (-" + alerts['missing'].astype(str) + ")")
+
 
+def parse_hhmm(value: str) -> int:
+    """Convert an HH:MM time to minutes after midnight."""
+    hour, minute = map(int, value.split(':'))
+    return hour * 60 + minute
 
-def calculate_total_morning_from_events(cursor: sqlite3.Cursor, target_date: str, morning_start: str, morning_end: str) -> int:
+
+def calculate_total_morning_from_events(conn: sqlite3.Connection, target_date: str, morning_start_min: int, morning_end_min: int) -> int:
     """
     Calculate total_morning from events in morning phase.
     
     Args:
-        cursor: Database cursor
+        conn: Database connection
         target_date: Target date (YYYY-MM-DD)
-        morning_start: Morning phase start (HH:MM)
-        morning_end: Morning phase end (HH:MM)
+        morning_start_min: Morning phase start (minutes after midnight)
+        morning_end_min: Morning phase end (minutes after midnight)
     
     Returns:
         Total morning count (IN - OUT during morning phase)
     """
     try:
-        start_hour, start_min = map(int, morning_start.split(':'))
-        end_hour, end_min = map(int, morning_end.split(':'))
-        
-        # Handle timestamp with timezone format (e.g., '2026-01-07T09:31:01+07:00')
-        # Use substr() to parse date and time from ISO 8601 format
-        start_minutes = start_hour * 60 + start_min
-        end_minutes = end_hour * 60 + end_min
-        cursor.execute("""
-            SELECT direction, COUNT(*) as count
-            FROM events
-            WHERE substr(timestamp, 1, 10) = ?
-              AND CAST(substr(timestamp, 12, 2) AS INTEGER) * 60 + CAST(substr(timestamp, 15, 2) AS INTEGER) >= ?
-              AND CAST(substr(timestamp, 12, 2) AS INTEGER) * 60 + CAST(substr(timestamp, 15, 2) AS INTEGER) < ?
-            GROUP BY direction
-        """, (target_date, start_minutes, end_minutes))
-        
-        results = cursor.fetchall()
-        in_count = 0
-        out_count = 0
+        # Timestamps are local ISO 8601 strings (e.g. '2026-01-07T09:31:01+07:00'), so
+        # the morning window is a plain string range that the timestamp index serves
+        start_iso = f"{target_date}T{morning_start_min // 60:02d}:{morning_start_min % 60:02d}"
+        end_iso = f"{target_date}T{morning_end_min // 60:02d}:{morning_end_min % 60:02d}"
         
         # Handle both uppercase (IN/OUT) and lowercase (in/out) directions
-        for direction, count in results:
-            dir_upper = direction.upper()
-            if dir_upper == 'IN':
-                in_count += count
-            elif dir_upper == 'OUT':
-                out_count += count
+        row = conn.execute("""
+            SELECT COALESCE(SUM(CASE UPPER(direction) WHEN 'IN' THEN 1 WHEN 'OUT' THEN -1 ELSE 0 END), 0)
+            FROM events
+            WHERE timestamp >= ? AND timestamp < ?
+        """, (start_iso, end_iso)).fetchone()
         
-        return in_count - out_count
+        return row[0]
     except Exception as e:
         print(f"Error calculating total_morning from events: {e}")
         return 0
 
 
-def get_events_for_date(cursor: sqlite3.Cursor, target_date: str) -> List[dict]:
-    """Get events for a specific date from people_events table."""
-    # Try to query with date() function first
+# Event tables the report can read, and the column holding each row's time
+EVENT_TIME_COLUMNS = {
+    'people_events': 'event_time',
+    'events': 'timestamp',
+}
+
+
+def parse_event_time(iso_time: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO event timestamp (a trailing Z is accepted); None if missing or invalid."""
+    if not iso_time:
+        return None
     try:
-        cursor.execute("""
-            SELECT event_time, direction, camera_id
-            FROM people_events
-            WHERE date(event_time) = ?
-            ORDER BY event_time ASC
-        """, (target_date,))
-    except sqlite3.OperationalError:
-        # Fallback: if date() doesn't work, use LIKE pattern
-        cursor.execute("""
-            SELECT event_time, direction, camera_id
-            FROM people_events
-            WHERE event_time LIKE ?
-            ORDER BY event_time ASC
-        """, (f"{target_date}%",))
-    
-    events = []
-    for row in cursor.fetchall():
-        events.append({
-            'event_time': row[0],
-            'direction': row[1],
-            'camera_id': row[2] if len(row) > 2 else ''
-        })
-    return events
+        return datetime.fromisoformat(iso_time.replace('Z', '+00:00'))
+    except ValueError:
+        return None
 
 
-def get_statistics_from_events(events: List[dict]) -> dict:
-    """Calculate statistics from events."""
-    stats = {
-        'total_in': 0,
-        'total_out': 0,
-        'first_event_time': None,
-        'last_event_time': None
+def get_event_stats_sql(conn: sqlite3.Connection, target_date: str, table: str = 'people_events') -> dict:
+    """
+    Calculate event statistics for a date in SQL: row count, IN/OUT totals,
+    first/last event time and the longest camera_id (for the EVENTS column width).
+    
+    Uses the same date filter as the EVENTS sheet query for that table, so the
+    figures always describe the rows in the sheet.
+    """
+    time_column = EVENT_TIME_COLUMNS[table]
+    row = conn.execute(f"""
+        SELECT COUNT(*),
+               COALESCE(SUM(UPPER(direction) = 'IN'), 0),
+               COALESCE(SUM(UPPER(direction) = 'OUT'), 0),
+               MIN({time_column}),
+               MAX({time_column}),
+               COALESCE(MAX(LENGTH(camera_id)), 0)
+        FROM {table}
+        WHERE date({time_column}) = ?
+    """, (target_date,)).fetchone()
+    event_count, total_in, total_out, first_time, last_time, max_camera_length = row
+    
+    return {
+        'event_count': event_count,
+        'total_in': total_in,
+        'total_out': total_out,
+        'first_event_time': parse_event_time(first_time),
+        'last_event_time': parse_event_time(last_time),
+        'max_camera_length': max_camera_length
     }
+
+
+def iter_events(conn: sqlite3.Connection, target_date: str, table: str = 'people_events') -> Iterator[Tuple]:
+    """
+    Yield the date's events as EVENTS sheet rows: (display time, DIRECTION, camera_id).
     
-    for event in events:
-        if event['direction'].lower() == 'in':
-            stats['total_in'] += 1
-        elif event['direction'].lower() == 'out':
-            stats['total_out'] += 1
-        
-        try:
-            event_dt = datetime.fromisoformat(event['event_time'].replace('Z', '+00:00'))
-            if stats['first_event_time'] is None or event_dt < stats['first_event_time']:
-                stats['first_event_time'] = event_dt
-            if stats['last_event_time'] is None or event_dt > stats['last_event_time']:
-                stats['last_event_time'] = event_dt
-        except:
-            pass
+    Rows are fetched in batches and formatted as they are written, so the day's
+    events are never held in memory at once. The query runs on a cursor of its own.
+    """
+    time_column = EVENT_TIME_COLUMNS[table]
+    cursor = conn.execute(f"""
+        SELECT {time_column}, direction, camera_id
+        FROM {table}
+        WHERE date({time_column}) = ?
+        ORDER BY {time_column} ASC
+    """, (target_date,))
+    
+    while True:
+        rows = cursor.fetchmany(1000)
+        if not rows:
+            break
+        for event_time, direction, camera_id in rows:
+            yield format_time_for_display(event_time), direction.upper(), camera_id
+
+
+def parse_wall_clock(iso_times: 'pd.Series') -> 'pd.Series':
+    """
+    Parse ISO timestamps to naive datetimes at their own wall-clock time; NaT if invalid.
     
-    return stats
+    The UTC offset (or Z) is dropped rather than converted, so each value keeps
+    the local time it was recorded with, as datetime.fromisoformat(...).strftime does.
+    """
+    wall_clock = iso_times.str.replace(r'(Z|[+-]\d{2}:\d{2})$', '', regex=True)
+    return pd.to_datetime(wall_clock, format='ISO8601', errors='coerce')
+
+
+# Leading 'YYYY-MM-DDTHH:MM:SS' of the timestamps the app stores (a space separator is also accepted)
+ISO_SECONDS_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}')
+
+
+def format_times_for_display(iso_times: 'pd.Series') -> 'pd.Series':
+    """Vectorized format_time_for_display: 'YYYY-MM-DD HH:MM:SS', unparseable values unchanged."""
+    if iso_times.str.match(ISO_SECONDS_PATTERN).fillna(False).all():
+        return iso_times.str[:10] + ' ' + iso_times.str[11:19]
+    return parse_wall_clock(iso_times).dt.strftime('%Y-%m-%d %H:%M:%S').fillna(iso_times)
 
 
 def format_time_for_display(iso_time: str) -> str:
     """Format ISO timestamp to readable time string."""
     try:
+        # Stored timestamps are fixed-width ISO 8601: slice out the wall-clock date and time
+        if ISO_SECONDS_PATTERN.match(iso_time):
+            return iso_time[:10] + ' ' + iso_time[11:19]
         dt = datetime.fromisoformat(iso_time.replace('Z', '+00:00'))
         return dt.strftime('%Y-%m-%d %H:%M:%S')
     except:
         return iso_time
 
 
-def export_daily_excel(target_date: Optional[str] = None, db_path: str = "data/people_counter.db") -> bool:
+def column_widths(df: 'pd.DataFrame') -> List[int]:
+    """Width per column: longest value or header as text, plus 2, capped at 50."""
+    widths = []
+    for column in df.columns:
+        max_length = len(str(column))
+        if len(df):
+            max_length = max(max_length, int(df[column].astype(str).str.len().max()))
+        widths.append(min(max_length + 2, 50))
+    return widths
+
+
+def events_column_widths(stats: dict) -> List[int]:
+    """EVENTS column widths from get_event_stats_sql: display times are 'YYYY-MM-DD HH:MM:SS'."""
+    if not stats['event_count']:
+        lengths = [0, 0, 0]
+    else:
+        lengths = [19, 3, stats['max_camera_length']]
+    return [min(max(len(header), length) + 2, 50) for header, length in zip(EVENTS_HEADERS, lengths)]
+
+
+def dataframe_sheet(sheet_name: str, df: 'pd.DataFrame') -> tuple:
+    """Sheet spec (name, headers, rows, row_count, widths) for a DataFrame; missing values become None."""
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    return sheet_name, list(df.columns), rows, len(df), column_widths(df)
+
+
+def write_workbook_xlsxwriter(temp_file: Path, sheets: List[tuple]) -> None:
+    """
+    Write the sheets with xlsxwriter in one pass, formatting included.
+    
+    Each sheet is a (name, headers, rows, row_count, widths) spec; rows may be a
+    one-shot iterator and are written in order (constant_memory mode).
+    """
+    workbook = xlsxwriter.Workbook(str(temp_file), {
+        'constant_memory': True,
+        # Write every value as-is: no formula/URL sniffing on strings
+        'strings_to_formulas': False,
+        'strings_to_urls': False,
+    })
+    header_format = workbook.add_format({
+        'bold': True, 'font_color': '#FFFFFF', 'bg_color': f'#{HEADER_COLOR}',
+        'align': 'center', 'valign': 'vcenter',
+    })
+    
+    for sheet_name, headers, rows, row_count, widths in sheets:
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.freeze_panes(1, 0)
+        worksheet.autofilter(0, 0, row_count, len(headers) - 1)
+        for col_idx, width in enumerate(widths):
+            worksheet.set_column(col_idx, col_idx, width)
+        
+        worksheet.write_row(0, 0, headers, header_format)
+        for row_idx, row in enumerate(rows, start=1):
+            worksheet.write_row(row_idx, 0, row)
+    
+    workbook.close()
+
+
+def write_workbook_openpyxl(temp_file: Path, sheets: List[tuple]) -> None:
+    """
+    Write the sheets with openpyxl in write-only mode, formatting included.
+    
+    Rows are streamed out as they are appended, so there is no in-memory cell
+    graph and no reload-and-restyle pass; widths and the filter range come
+    from each (name, headers, rows, row_count, widths) spec up front.
+    """
+    wb = Workbook(write_only=True)
+    header_fill = PatternFill(start_color=HEADER_COLOR, end_color=HEADER_COLOR, fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    header_alignment = Alignment(horizontal="center", vertical="center")
+    
+    for sheet_name, headers, rows, row_count, widths in sheets:
+        ws = wb.create_sheet(sheet_name)
+        
+        # Freeze header row
+        ws.freeze_panes = 'A2'
+        
+        # Enable filter over the header and every data row
+        ws.auto_filter.ref = f"A1:{get_column_letter(len(headers))}{row_count + 1}"
+        
+        for col_idx, width in enumerate(widths, start=1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+        
+        # Header row
+        header_cells = []
+        for column in headers:
+            cell = WriteOnlyCell(ws, value=column)
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = header_alignment
+            header_cells.append(cell)
+        ws.append(header_cells)
+        
+        for row in rows:
+            ws.append(row)
+    
+    wb.save(temp_file)
+
+
+def write_events_csv(output_file: Path, rows: Iterator[Tuple]) -> None:
+    """Stream EVENTS rows to a CSV file (written to a temp file, then swapped in)."""
+    temp_file = output_file.with_name(output_file.stem + '.tmp.csv')
+    with open(temp_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(EVENTS_HEADERS)
+        writer.writerows(rows)
+    os.replace(temp_file, output_file)
+
+
+def write_events_parquet(output_file: Path, rows: Iterator[Tuple]) -> None:
+    """Write EVENTS rows to a zstd-compressed Parquet file (written to a temp file, then swapped in)."""
+    temp_file = output_file.with_name(output_file.stem + '.tmp.parquet')
+    df = pd.DataFrame.from_records(rows, columns=EVENTS_HEADERS)
+    df.to_parquet(temp_file, compression='zstd', index=False)
+    os.replace(temp_file, output_file)
+
+
+def export_daily_excel(target_date: Optional[str] = None, db_path: str = "data/people_counter.db",
+                       output_format: str = 'xlsx') -> bool:
     """
     Export daily Excel report from SQLite database.
     
@@ -303,6 +462,7 @@ def export_daily_excel(target_date: Optional[str] = None, db_path: str = "data/p
     Args:
         target_date: Target date in YYYY-MM-DD format (default: today)
         db_path: Path to SQLite database file
+        output_format: 'xlsx' (default), 'csv' or 'parquet' (EVENTS table only), or 'all'
     
     Returns:
         True if successful, False otherwise
@@ -318,6 +478,14 @@ def export_daily_excel(target_date: Optional[str] = None, db_path: str = "data/p
         print(f"Error: Invalid date format. Use YYYY-MM-DD")
         return False
     
+    if output_format not in OUTPUT_FORMATS:
+        print(f"Error: Invalid output format '{output_format}'. Use one of: {', '.join(OUTPUT_FORMATS)}")
+        return False
+    if output_format in ('parquet', 'all') and not PYARROW_AVAILABLE:
+        print("Error: Parquet output requires pyarrow. Please install:")
+        print("  pip install pyarrow")
+        return False
+    
     # Check if database exists
     if not Path(db_path).exists():
         print(f"Error: Database file not found: {db_path}")
@@ -332,46 +500,49 @@ def export_daily_excel(target_date: Optional[str] = None, db_path: str = "data/p
     temp_file = exports_dir / f"people_counter_{target_date}.tmp.xlsx"
     
     try:
-        # Connect to database
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Create tables if they don't exist
-        create_alert_logs_table_if_not_exists(cursor)
-        
-        # Create people_events table if it doesn't exist (new schema)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS people_events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_time TEXT NOT NULL,
-                direction TEXT NOT NULL,
-                camera_id TEXT NOT NULL,
-                created_at TEXT NOT NULL DEFAULT (datetime('now'))
-            )
-        """)
+        # Connect read-only: the export never writes to the database
+        conn = connect_read_only(db_path)
         
-        # Create daily_summary table if it doesn't exist
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS daily_summary (
-                date TEXT PRIMARY KEY,
-                total_morning INTEGER NOT NULL DEFAULT 0,
-                updated_at TEXT NOT NULL DEFAULT (datetime('now'))
-            )
-        """)
+        # One read transaction for the whole export: every query (including the
+        # EVENTS stream) sees the same snapshot and the read lock is taken once
+        conn.execute("BEGIN DEFERRED")
+        existing_tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
         
-        # Also check for old schema (events table) and migrate if needed
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='events'")
-        has_old_events = cursor.fetchone() is not None
-        
-        conn.commit()
+        missing_tables = [t for t in REPORT_TABLES if t not in existing_tables]
+        if missing_tables:
+            print(f"Error: Database is missing tables {', '.join(missing_tables)}; start the app once to initialize it")
+            conn.close()
+            return False
         
-        # Get data - try both schemas
-        summary = get_daily_summary(cursor, target_date)
-        daily_state = get_daily_state(cursor, target_date)
-        alerts = get_alerts_for_date(cursor, target_date)
+        # Also check for old schema (events table)
+        has_old_events = 'events' in existing_tables
         
-        # Try new schema first (people_events), then old schema (events)
-        events = get_events_for_date(cursor, target_date)
+        events_table = 'people_events'
+        if has_rows_for_date(conn, target_date, has_old_events):
+            # Get data - try both schemas
+            summary = get_daily_summary(conn, target_date)
+            daily_state = get_daily_state(conn, target_date)
+            alerts = get_alerts_for_date(conn, target_date)
+            
+            # Try new schema first (people_events), then old schema (events)
+            stats = get_event_stats_sql(conn, target_date, events_table)
+            if stats['event_count'] == 0 and has_old_events:
+                events_table = 'events'
+                stats = get_event_stats_sql(conn, target_date, events_table)
+        else:
+            # Nothing recorded for this date: skip the data queries, the report is empty
+            summary = None
+            daily_state = None
+            alerts = pd.DataFrame(columns=['alert_time', 'expected_total', 'current_total', 'missing'])
+            stats = {
+                'event_count': 0,
+                'total_in': 0,
+                'total_out': 0,
+                'first_event_time': None,
+                'last_event_time': None,
+                'max_camera_length': 0
+            }
+        event_count = stats['event_count']
         
         # Calculate total_morning from morning phase events if not in daily_state
         # Use hardcoded values (11:05-11:14) - matching main.py TimeManager
@@ -379,53 +550,35 @@ def export_daily_excel(target_date: Optional[str] = None, db_path: str = "data/p
         morning_end = "11:14"
         
         # Try to get from config if available (but use hardcoded as fallback)
+        # (load_config() builds a fresh Config, so env/.env changes are picked up without a reload)
         try:
-            import sys
-            import importlib
-            # Clear config cache
-            if 'app.config' in sys.modules:
-                importlib.reload(sys.modules['app.config'])
             from app.config import load_config
             config = load_config()
             # Only use config if values are not the old defaults
             if config.production.morning_start != "16:27" and config.production.morning_end != "16:33":
                 morning_start = config.production.morning_start
                 morning_end = config.production.morning_end
+            morning_start_min, morning_end_min = parse_hhmm(morning_start), parse_hhmm(morning_end)
             print(f"Debug - Using morning times: {morning_start}-{morning_end}")
         except Exception as e:
+            morning_start, morning_end = "11:05", "11:14"
+            morning_start_min, morning_end_min = parse_hhmm(morning_start), parse_hhmm(morning_end)
             print(f"Debug - Using defaults: {morning_start}-{morning_end} ({e})")
-        if not events and has_old_events:
-            # Try old schema
-            cursor.execute("""
-                SELECT timestamp as event_time, direction, camera_id
-                FROM events
-                WHERE date(timestamp) = ?
-                ORDER BY timestamp ASC
-            """, (target_date,))
-            events = []
-            for row in cursor.fetchall():
-                events.append({
-                    'event_time': row[0],
-                    'direction': row[1],
-                    'camera_id': row[2]
-                })
-        
         # Check if database is empty and show warning
-        has_data = (summary and summary.get('total_morning', 0) > 0) or (daily_state and daily_state.get('total_morning', 0) > 0) or len(events) > 0 or len(alerts) > 0
-        stats = get_statistics_from_events(events)
+        has_data = (summary and summary.get('total_morning', 0) > 0) or (daily_state and daily_state.get('total_morning', 0) > 0) or event_count > 0 or len(alerts) > 0
         missing_periods = calculate_missing_periods_with_duration(alerts)
         
         # Prepare summary data - use daily_state if available (more accurate)
         # Debug: Print what we found
         print(f"\nDebug - daily_state: {daily_state}")
         print(f"Debug - summary: {summary}")
-        print(f"Debug - events count: {len(events)}")
+        print(f"Debug - events count: {event_count}")
         
         if daily_state:
             total_morning = daily_state.get('total_morning', 0) or 0
             # If total_morning is 0 or None, calculate from morning phase events
             if total_morning == 0 or total_morning is None:
-                calculated = calculate_total_morning_from_events(cursor, target_date, morning_start, morning_end)
+                calculated = calculate_total_morning_from_events(conn, target_date, morning_start_min, morning_end_min)
                 print(f"Debug - Calculated total_morning from events: {calculated} (morning_start={morning_start}, morning_end={morning_end})")
                 if calculated > 0:
                     total_morning = calculated
@@ -433,7 +586,7 @@ def export_daily_excel(target_date: Optional[str] = None, db_path: str = "data/p
             realtime_in = daily_state.get('realtime_in', 0) or 0
             realtime_out = daily_state.get('realtime_out', 0) or 0
             # If no events, use realtime counts from state
-            if not events:
+            if not event_count:
                 total_in_all_day = realtime_in
                 total_out_all_day = realtime_out
                 status_msg = "Data from State (No Events Recorded)"
@@ -447,7 +600,7 @@ def export_daily_excel(target_date: Optional[str] = None, db_path: str = "data/p
             total_morning = summary.get('total_morning', 0) or 0
             # If total_morning is 0, calculate from morning phase events
             if total_morning == 0:
-                total_morning = calculate_total_morning_from_events(cursor, target_date, morning_start, morning_end)
+                total_morning = calculate_total_morning_from_events(conn, target_date, morning_start_min, morning_end_min)
                 if total_morning > 0:
                     print(f"Debug - Calculated total_morning from events: {total_morning}")
             total_in_all_day = stats['total_in']
@@ -457,135 +610,118 @@ def export_daily_excel(target_date: Optional[str] = None, db_path: str = "data/p
             print(f"Debug - Using summary: total_morning={total_morning}")
         else:
             # Calculate from morning phase events as last resort
-            total_morning = calculate_total_morning_from_events(cursor, target_date, morning_start, morning_end)
+            total_morning = calculate_total_morning_from_events(conn, target_date, morning_start_min, morning_end_min)
             total_in_all_day = stats['total_in']
             total_out_all_day = stats['total_out']
             last_updated = 'N/A'
             status_msg = "Database Empty / No Data for this Date"
             print(f"Debug - No state found, using defaults")
         
-        # Create Excel writer (use temp file first)
-        with pd.ExcelWriter(temp_file, engine='openpyxl') as writer:
-            # ========== Sheet 1: SUMMARY ==========
-            first_event_str = stats['first_event_time'].strftime('%H:%M:%S') if stats['first_event_time'] else 'N/A'
-            last_event_str = stats['last_event_time'].strftime('%H:%M:%S') if stats['last_event_time'] else 'N/A'
-            
-            summary_data = {
-                'Field': [
-                    'Date', 
-                    'Total Morning', 
-                    'Total IN (All Day)', 
-                    'Total OUT (All Day)',
-                    'First Event Time',
-                    'Last Event Time',
-                    'Missing Periods Count',
-                    'Last Updated',
-                    'Status'
+        # Build the four sheets, then write them (use temp file first)
+        # ========== Sheet 1: SUMMARY ==========
+        first_event_str = stats['first_event_time'].strftime('%H:%M:%S') if stats['first_event_time'] else 'N/A'
+        last_event_str = stats['last_event_time'].strftime('%H:%M:%S') if stats['last_event_time'] else 'N/A'
+        
+        summary_data = {
+            'Field': [
+                'Date', 
+                'Total Morning', 
+                'Total IN (All Day)', 
+                'Total OUT (All Day)',
+                'First Event Time',
+                'Last Event Time',
+                'Missing Periods Count',
+                'Last Updated',
+                'Status'
+            ],
+            'Value': [
+                target_date,
+                total_morning,
+                total_in_all_day,
+                total_out_all_day,
+                first_event_str,
+                last_event_str,
+                len(missing_periods),
+                last_updated,
+                status_msg
+            ]
+        }
+        df_summary = pd.DataFrame(summary_data)
+        
+        # ========== Sheet 2: MISSING PERIODS (with duration) ==========
+        if missing_periods:
+            periods_data = {
+                'Start Time': [p['start_time'].strftime('%Y-%m-%d %H:%M:%S') for p in missing_periods],
+                'End Time': [p['end_time'].strftime('%Y-%m-%d %H:%M:%S') for p in missing_periods],
+                'Duration (minutes)': [round(p['duration_minutes'], 1) for p in missing_periods],
+                'Duration (formatted)': [
+                    f"{int(p['duration_minutes']//60)}h {int(p['duration_minutes']%60)}m" 
+                    if p['duration_minutes'] >= 60 
+                    else f"{int(p['duration_minutes'])}m" 
+                    for p in missing_periods
                 ],
-                'Value': [
-                    target_date,
-                    total_morning,
-                    total_in_all_day,
-                    total_out_all_day,
-                    first_event_str,
-                    last_event_str,
-                    len(missing_periods),
-                    last_updated,
-                    status_msg
-                ]
+                'Missing People': [p['missing'] for p in missing_periods],
+                'Expected': [p['expected'] for p in missing_periods],
+                'Current': [p['current'] for p in missing_periods]
             }
-            df_summary = pd.DataFrame(summary_data)
-            df_summary.to_excel(writer, sheet_name='SUMMARY', index=False)
-            
-            # ========== Sheet 2: MISSING PERIODS (with duration) ==========
-            if missing_periods:
-                periods_data = {
-                    'Start Time': [p['start_time'].strftime('%Y-%m-%d %H:%M:%S') for p in missing_periods],
-                    'End Time': [p['end_time'].strftime('%Y-%m-%d %H:%M:%S') for p in missing_periods],
-                    'Duration (minutes)': [round(p['duration_minutes'], 1) for p in missing_periods],
-                    'Duration (formatted)': [
-                        f"{int(p['duration_minutes']//60)}h {int(p['duration_minutes']%60)}m" 
-                        if p['duration_minutes'] >= 60 
-                        else f"{int(p['duration_minutes'])}m" 
-                        for p in missing_periods
-                    ],
-                    'Missing People': [p['missing'] for p in missing_periods],
-                    'Expected': [p['expected'] for p in missing_periods],
-                    'Current': [p['current'] for p in missing_periods]
-                }
-                df_periods = pd.DataFrame(periods_data)
-            else:
-                df_periods = pd.DataFrame(columns=[
-                    'Start Time', 'End Time', 'Duration (minutes)', 'Duration (formatted)', 
-                    'Missing People', 'Expected', 'Current'
-                ])
-            df_periods.to_excel(writer, sheet_name='MISSING PERIODS', index=False)
-            
-            # ========== Sheet 3: ALERTS (detailed) ==========
-            if alerts:
-                alerts_data = {
-                    'Time': [format_time_for_display(a['alert_time']) for a in alerts],
-                    'Expected': [a['expected_total'] for a in alerts],
-                    'Current': [a['current_total'] for a in alerts],
-                    'Missing': [a['missing'] for a in alerts]
-                }
-                df_alerts = pd.DataFrame(alerts_data)
-            else:
-                df_alerts = pd.DataFrame(columns=['Time', 'Expected', 'Current', 'Missing'])
-            df_alerts.to_excel(writer, sheet_name='ALERTS', index=False)
-            
-            # ========== Sheet 4: EVENTS (IN/OUT with time) ==========
-            if events:
-                events_data = {
-                    'Time': [format_time_for_display(e['event_time']) for e in events],
-                    'Direction': [e['direction'].upper() for e in events],
-                    'Camera': [e['camera_id'] for e in events]
-                }
-                df_events = pd.DataFrame(events_data)
-            else:
-                df_events = pd.DataFrame(columns=['Time', 'Direction', 'Camera'])
-            df_events.to_excel(writer, sheet_name='EVENTS', index=False)
+            df_periods = pd.DataFrame(periods_data)
+        else:
+            df_periods = pd.DataFrame(columns=[
+                'Start Time', 'End Time', 'Duration (minutes)', 'Duration (formatted)', 
+                'Missing People', 'Expected', 'Current'
+            ])
         
-        # Apply formatting using openpyxl (load from temp_file, not output_file)
-        wb = load_workbook(temp_file)
+        # ========== Sheet 3: ALERTS (detailed) ==========
+        if not alerts.empty:
+            alerts_data = {
+                'Time': format_times_for_display(alerts['alert_time']),
+                'Expected': alerts['expected_total'],
+                'Current': alerts['current_total'],
+                'Missing': alerts['missing']
+            }
+            df_alerts = pd.DataFrame(alerts_data)
+        else:
+            df_alerts = pd.DataFrame(columns=['Time', 'Expected', 'Current', 'Missing'])
         
-        # Format all sheets
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
+        # ========== Sheet 4: EVENTS (IN/OUT with time) ==========
+        # Streamed from the database while the sheet is written
+        events_sheet = (
+            'EVENTS', EVENTS_HEADERS,
+            iter_events(conn, target_date, events_table) if event_count else iter(()),
+            event_count, events_column_widths(stats)
+        )
         
-        for sheet_name in ['SUMMARY', 'MISSING PERIODS', 'ALERTS', 'EVENTS']:
-            if sheet_name not in wb.sheetnames:
-                continue
-            
-            ws = wb[sheet_name]
-            
-            # Format header row
-            for cell in ws[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-            
-            # Freeze header row
-            ws.freeze_panes = 'A2'
-            
-            # Enable filter
-            ws.auto_filter.ref = ws.dimensions
-            
-            # Auto-adjust column widths
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
+        sheets = [
+            dataframe_sheet('SUMMARY', df_summary),
+            dataframe_sheet('MISSING PERIODS', df_periods),
+            dataframe_sheet('ALERTS', df_alerts),
+            events_sheet,
+        ]
         
-        # Save workbook to temp file first
-        wb.save(temp_file)
+        # Machine-readable EVENTS outputs for downstream consumers
+        if output_format in ('csv', 'all'):
+            csv_file = exports_dir / f"events_{target_date}.csv"
+            write_events_csv(csv_file, iter_events(conn, target_date, events_table) if event_count else iter(()))
+            print(f"CSV file: {csv_file}")
+        if output_format in ('parquet', 'all'):
+            parquet_file = exports_dir / f"events_{target_date}.parquet"
+            write_events_parquet(parquet_file, iter_events(conn, target_date, events_table) if event_count else iter(()))
+            print(f"Parquet file: {parquet_file}")
+        if output_format not in ('xlsx', 'all'):
+            conn.execute("COMMIT")
+            conn.close()
+            print(f"\nExport completed successfully!")
+            print(f"Date: {target_date}")
+            print(f"Events: {event_count}")
+            return True
+        
+        # Single pass: data and formatting written together, no reload
+        if XLSXWRITER_AVAILABLE:
+            write_workbook_xlsxwriter(temp_file, sheets)
+        else:
+            write_workbook_openpyxl(temp_file, sheets)
+        
+        conn.execute("COMMIT")
         conn.close()
         
         # Rename temp file to final file (atomic operation)
@@ -605,7 +741,7 @@ def export_daily_excel(target_date: Optional[str] = None, db_path: str = "data/p
             print(f"Date: {target_date}")
             print(f"Total Morning: {total_morning}")
             print(f"Total IN: {total_in_all_day}, Total OUT: {total_out_all_day}")
-            print(f"Events: {len(events)}")
+            print(f"Events: {event_count}")
             print(f"Missing Periods: {len(missing_periods)}")
             print(f"Alerts: {len(alerts)}")
             print(f"Output file: {output_file}")
@@ -644,7 +780,13 @@ if __name__ == "__main__":
         default="data/people_counter.db",
         help="Path to SQLite database file (default: data/people_counter.db)"
     )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="xlsx",
+        help="Output format: xlsx workbook, csv/parquet EVENTS table, or all (default: xlsx)"
+    )
     
     args = parser.parse_args()
-    export_daily_excel(args.date, args.db)
+    export_daily_excel(args.date, args.db, args.format)
 
@@ -1,6 +1,7 @@
 """Export aggregated Excel report for last 5 days."""
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional
@@ -44,51 +45,90 @@ def get_latest_5_daily_files(daily_dir: Path) -> List[Path]:
     return [f[1] for f in files_with_dates[:5]]
 
 
-def read_summary_from_excel(file_path: Path) -> Optional[Dict]:
-    """Read SUMMARY sheet from Excel file."""
-    try:
-        df = pd.read_excel(file_path, sheet_name='SUMMARY')
-        # Excel format: Field | Value columns
-        summary = {}
-        for _, row in df.iterrows():
-            field = str(row.get('Field', ''))
-            value = row.get('Value', '')
-            if field == 'Date':
-                summary['date'] = str(value) if pd.notna(value) else ''
-            elif field == 'Total Morning':
-                summary['total_morning'] = int(value) if pd.notna(value) else 0
-            elif field == 'Missing Periods':
-                summary['missing_periods'] = str(value) if pd.notna(value) else 'None'
-        return summary if summary else None
-    except Exception as e:
-        print(f"Warning: Could not read SUMMARY from {file_path.name}: {e}")
-        return None
+def read_sheet_records(wb, sheet_name: str) -> List[Dict]:
+    """
+    Read a sheet of an open workbook as a list of {header: value} dicts.
+    
+    The first row is the header; empty cells read as None. Rows are streamed
+    from the read-only workbook, so no pandas DataFrame is built for these
+    small sheets.
+    """
+    rows = wb[sheet_name].iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return []
+    records = list(rows)
+    
+    # Drop trailing empty rows (as pandas.read_excel does)
+    while records and all(value is None for value in records[-1]):
+        records.pop()
+    return [dict(zip(header, row)) for row in records]
 
 
-def read_alerts_from_excel(file_path: Path) -> List[Dict]:
-    """Read ALERTS sheet from Excel file."""
-    try:
-        df = pd.read_excel(file_path, sheet_name='ALERTS')
-        alerts = []
-        file_date = parse_date_from_filename(file_path.name)
+def parse_summary(records: List[Dict]) -> Optional[Dict]:
+    """Parse SUMMARY sheet rows (Field | Value columns)."""
+    summary = {}
+    for row in records:
+        field = str(row.get('Field', ''))
+        value = row.get('Value', '')
+        if field == 'Date':
+            summary['date'] = str(value) if value is not None else ''
+        elif field == 'Total Morning':
+            summary['total_morning'] = int(value) if value is not None else 0
+        elif field == 'Missing Periods':
+            summary['missing_periods'] = str(value) if value is not None else 'None'
+    return summary if summary else None
+
+
+def parse_alerts(records: List[Dict], file_date: Optional[date]) -> List[Dict]:
+    """Parse ALERTS sheet rows."""
+    alerts = []
+    for row in records:
+        # Skip empty rows
+        if row.get('Time Window', '') is None and row.get('Missing', '') is None:
+            continue
         
-        for _, row in df.iterrows():
-            # Skip empty rows
-            if pd.isna(row.get('Time Window', '')) and pd.isna(row.get('Missing', '')):
-                continue
-            
-            time_window = str(row.get('Time Window', '')) if pd.notna(row.get('Time Window', '')) else ''
-            missing = int(row.get('Missing', 0)) if pd.notna(row.get('Missing', '')) else 0
-            
-            alerts.append({
-                'date': file_date,
-                'time_window': time_window,
-                'missing': missing
-            })
-        return alerts
+        time_window = str(row.get('Time Window', '')) if row.get('Time Window', '') is not None else ''
+        missing = int(row.get('Missing', 0)) if row.get('Missing', '') is not None else 0
+        
+        alerts.append({
+            'date': file_date,
+            'time_window': time_window,
+            'missing': missing
+        })
+    return alerts
+
+
+def read_daily_file(file_path: Path) -> Dict:
+    """
+    Read SUMMARY and ALERTS from a daily Excel file, opening the workbook once.
+    
+    Returns:
+        Dict with 'summary' (None if unreadable) and 'alerts' (list)
+    """
+    summary = None
+    alerts = []
+    try:
+        wb = load_workbook(file_path, read_only=True, data_only=True)
     except Exception as e:
-        print(f"Warning: Could not read ALERTS from {file_path.name}: {e}")
-        return []
+        print(f"Warning: Could not open {file_path.name}: {e}")
+        return {'summary': summary, 'alerts': alerts}
+    
+    try:
+        try:
+            summary = parse_summary(read_sheet_records(wb, 'SUMMARY'))
+        except Exception as e:
+            print(f"Warning: Could not read SUMMARY from {file_path.name}: {e}")
+        
+        try:
+            alerts = parse_alerts(read_sheet_records(wb, 'ALERTS'), parse_date_from_filename(file_path.name))
+        except Exception as e:
+            print(f"Warning: Could not read ALERTS from {file_path.name}: {e}")
+            alerts = []
+    finally:
+        wb.close()
+    
+    return {'summary': summary, 'alerts': alerts}
 
 
 def export_last_5_days_excel(daily_dir: str = "exports/daily", output_file: str = None) -> bool:
@@ -128,9 +168,13 @@ def export_last_5_days_excel(daily_dir: str = "exports/daily", output_file: str
         overview_data = []
         alert_history_data = []
         
-        for file_path in daily_files:
-            # Read SUMMARY
-            summary = read_summary_from_excel(file_path)
+        # Files are independent: read them concurrently, collect in date order
+        with ThreadPoolExecutor(max_workers=min(5, len(daily_files))) as executor:
+            results = list(executor.map(read_daily_file, daily_files))
+        
+        for data in results:
+            # SUMMARY
+            summary = data['summary']
             if summary:
                 overview_data.append({
                     'Date': summary.get('date', ''),
@@ -138,9 +182,8 @@ def export_last_5_days_excel(daily_dir: str = "exports/daily", output_file: str
                     'Missing Periods': summary.get('missing_periods', 'None')
                 })
             
-            # Read ALERTS
-            alerts = read_alerts_from_excel(file_path)
-            for alert in alerts:
+            # ALERTS
+            for alert in data['alerts']:
                 date_str = ''
                 if alert['date']:
                     if isinstance(alert['date'], date):
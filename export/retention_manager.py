@@ -7,6 +7,8 @@ from pathlib import Path
 from datetime import datetime, date, timedelta
 from typing import List, Tuple, Optional
 
+from export.excel_exporter import signature_file
+
 logger = logging.getLogger(__name__)
 
 
@@ -48,6 +50,7 @@ def cleanup_old_daily_files(daily_dir: str = "exports/daily", retention_days: in
                 if file_date and file_date < cutoff_date:
                     # File is older than retention period
                     file_path.unlink()
+                    signature_file(file_path).unlink(missing_ok=True)
                     deleted_count += 1
                     deleted_files.append(file_path.name)
                     logger.info(f"RETENTION_DELETE: {file_path.name} (date: {file_date}, cutoff: {cutoff_date})")
@@ -4,10 +4,16 @@ Reads only from existing daily Excel files (trusted source).
 """
 
 import logging
+import os
+import pickle
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 from openpyxl import load_workbook
 from openpyxl.styles import Font, Alignment, PatternFill
@@ -60,16 +66,22 @@ def export_rolling_summary(
         all_alerts = []
         all_missing_periods = []
         
-        for file_date, file_path in daily_files:
-            try:
-                data = _read_daily_file(file_path, file_date)
-                if data:
-                    daily_summaries.append(data['summary'])
-                    all_alerts.extend(data['alerts'])
-                    all_missing_periods.extend(data['missing_periods'])
-            except Exception as e:
-                logger.error(f"Error reading daily file {file_path.name}: {e}", exc_info=True)
-                continue
+        # Parsed results are cached per file version; drop entries for files
+        # that changed or are gone
+        cache_dir = Path(summary_dir) / ".cache"
+        _evict_stale_cache(cache_dir, [file_path for _, file_path in daily_files])
+        
+        # Files are independent: read them concurrently (errors are logged per file
+        # by _read_daily_file), then collect in the original order
+        with ThreadPoolExecutor(max_workers=min(5, len(daily_files))) as executor:
+            file_dates, file_paths = zip(*daily_files)
+            results = list(executor.map(_read_daily_file_cached, file_paths, file_dates, repeat(cache_dir)))
+        
+        for data in results:
+            if data:
+                daily_summaries.append(data['summary'])
+                all_alerts.extend(data['alerts'])
+                all_missing_periods.extend(data['missing_periods'])
         
         if not daily_summaries:
             logger.error("No valid data found in daily files")
@@ -149,10 +161,90 @@ def export_rolling_summary(
         return False
 
 
+def _cache_key(file_path: Path) -> str:
+    """Cache file name for the current version of a daily file (name, mtime, size)."""
+    stat = file_path.stat()
+    return f"{file_path.name}-{stat.st_mtime_ns}-{stat.st_size}.pkl"
+
+
+def _evict_stale_cache(cache_dir: Path, file_paths: List[Path]) -> None:
+    """Delete cached results that don't match the current version of a daily file."""
+    if not cache_dir.exists():
+        return
+    try:
+        valid_keys = {_cache_key(file_path) for file_path in file_paths if file_path.exists()}
+        for cache_file in cache_dir.glob("*.pkl"):
+            if cache_file.name not in valid_keys:
+                cache_file.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"Could not clean summary cache {cache_dir}: {e}")
+
+
+def _read_daily_file_cached(file_path: Path, file_date, cache_dir: Path) -> Optional[Dict]:
+    """
+    _read_daily_file with an on-disk cache keyed by (file name, mtime, size).
+    
+    Unchanged daily files are not re-parsed. Cache errors are never fatal: an
+    unreadable entry is treated as a miss and a failed write is only logged.
+    """
+    try:
+        cache_file = cache_dir / _cache_key(file_path)
+    except OSError:
+        return _read_daily_file(file_path, file_date)
+    
+    if cache_file.exists():
+        try:
+            with open(cache_file, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable summary cache entry {cache_file.name}: {e}")
+    
+    data = _read_daily_file(file_path, file_date)
+    if data is not None:
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write to a temp file, then swap in, so readers never see a partial entry
+            fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, cache_file)
+            except BaseException:
+                Path(temp_path).unlink(missing_ok=True)
+                raise
+        except Exception as e:
+            logger.warning(f"Could not write summary cache for {file_path.name}: {e}")
+    return data
+
+
+def _sheet_records(wb, sheet_name: str) -> List[Dict]:
+    """
+    Rows of a read-only workbook sheet as {header: value} dicts.
+    
+    The first row is the header. As with pandas.read_excel, trailing empty rows
+    are dropped and empty cells read as NaN, so values convert as they did when
+    the sheets were loaded through pandas.
+    """
+    rows = wb[sheet_name].iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return []
+    records = list(rows)
+    while records and all(value is None for value in records[-1]):
+        records.pop()
+    return [
+        dict(zip(header, (float('nan') if value is None else value for value in row)))
+        for row in records
+    ]
+
+
 def _read_daily_file(file_path: Path, file_date) -> Optional[Dict]:
     """
     Read data from a daily Excel file.
     
+    The workbook is opened once in openpyxl read-only mode and its sheets are
+    streamed row by row; the sheets are small, so no DataFrames are built.
+    
     Args:
         file_path: Path to daily Excel file
         file_date: date object for the file
@@ -163,27 +255,23 @@ def _read_daily_file(file_path: Path, file_date) -> Optional[Dict]:
     try:
         date_str = file_date.strftime('%Y-%m-%d')
         
-        # Read all sheets
-        xls = pd.ExcelFile(file_path)
-        
-        # Read SUMMARY sheet
-        if 'SUMMARY' not in xls.sheet_names:
-            logger.warning(f"SUMMARY sheet not found in {file_path.name}")
-            return None
-        
-        df_summary = pd.read_excel(xls, sheet_name='SUMMARY')
-        summary_dict = dict(zip(df_summary['Field'], df_summary['Value']))
-        
-        # Extract summary data
-        total_morning = int(summary_dict.get('Total Morning', 0) or 0)
-        realtime = int(summary_dict.get('Current Realtime', 0) or 0)
-        
-        # Read ALERTS sheet
-        alerts = []
-        if 'ALERTS' in xls.sheet_names:
-            df_alerts = pd.read_excel(xls, sheet_name='ALERTS')
-            if not df_alerts.empty:
-                for _, row in df_alerts.iterrows():
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            # Read SUMMARY sheet
+            if 'SUMMARY' not in wb.sheetnames:
+                logger.warning(f"SUMMARY sheet not found in {file_path.name}")
+                return None
+            
+            summary_dict = {row.get('Field'): row.get('Value') for row in _sheet_records(wb, 'SUMMARY')}
+            
+            # Extract summary data
+            total_morning = int(summary_dict.get('Total Morning', 0) or 0)
+            realtime = int(summary_dict.get('Current Realtime', 0) or 0)
+            
+            # Read ALERTS sheet
+            alerts = []
+            if 'ALERTS' in wb.sheetnames:
+                for row in _sheet_records(wb, 'ALERTS'):
                     alerts.append({
                         'Date': date_str,
                         'alert_time': str(row.get('alert_time', '')),
@@ -191,14 +279,12 @@ def _read_daily_file(file_path: Path, file_date) -> Optional[Dict]:
                         'realtime': int(row.get('realtime', 0) or 0),
                         'missing': int(row.get('missing', 0) or 0)
                     })
-        
-        # Read MISSING_PERIODS sheet
-        missing_periods = []
-        if 'MISSING_PERIODS' in xls.sheet_names:
-            df_missing = pd.read_excel(xls, sheet_name='MISSING_PERIODS')
-            if not df_missing.empty:
-                total_missing_minutes = 0
-                for _, row in df_missing.iterrows():
+            
+            # Read MISSING_PERIODS sheet
+            missing_periods = []
+            total_missing_minutes = 0
+            if 'MISSING_PERIODS' in wb.sheetnames:
+                for row in _sheet_records(wb, 'MISSING_PERIODS'):
                     duration = int(row.get('duration_minutes', 0) or 0)
                     total_missing_minutes += duration
                     missing_periods.append({
@@ -207,30 +293,24 @@ def _read_daily_file(file_path: Path, file_date) -> Optional[Dict]:
                         'end_time': str(row.get('end_time', '')),
                         'duration_minutes': duration
                     })
-        else:
-            total_missing_minutes = 0
-        
-        # Read EVENTS sheet to calculate max/min realtime
-        max_realtime = realtime
-        min_realtime = realtime
-        
-        if 'EVENTS' in xls.sheet_names:
-            df_events = pd.read_excel(xls, sheet_name='EVENTS')
-            if not df_events.empty:
-                # Calculate cumulative count from events
-                current_count = 0
-                max_realtime = 0
-                min_realtime = 0
-                
-                for _, row in df_events.iterrows():
-                    direction = str(row.get('direction', '')).upper()
-                    if direction == 'IN':
-                        current_count += 1
-                    elif direction == 'OUT':
-                        current_count -= 1
-                    
-                    max_realtime = max(max_realtime, current_count)
-                    min_realtime = min(min_realtime, current_count)
+            
+            # Read EVENTS sheet to calculate max/min realtime
+            max_realtime = realtime
+            min_realtime = realtime
+            
+            if 'EVENTS' in wb.sheetnames:
+                events = _sheet_records(wb, 'EVENTS')
+                if events:
+                    # Running count from events (IN +1, OUT -1), starting at 0
+                    directions = np.char.upper(np.array([str(row.get('direction', '')) for row in events]))
+                    deltas = np.zeros(len(directions), dtype=np.int64)
+                    deltas[directions == 'IN'] = 1
+                    deltas[directions == 'OUT'] = -1
+                    running = deltas.cumsum()
+                    max_realtime = int(running.max(initial=0))
+                    min_realtime = int(running.min(initial=0))
+        finally:
+            wb.close()
         
         # Build summary row
         summary = {
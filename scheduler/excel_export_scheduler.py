@@ -46,6 +46,7 @@ class ExcelExportScheduler:
         """
         try:
             logger.info("Starting Excel file cleanup (keeping last 5 days)...")
+            from export.excel_exporter import signature_file
 
             # Get all Excel files in the daily directory
             excel_files = list(self.daily_dir.glob("people_counter_*.xlsx"))
@@ -79,6 +80,7 @@ class ExcelExportScheduler:
                 try:
                     filename = file_path.name
                     file_path.unlink()
+                    signature_file(file_path).unlink(missing_ok=True)
                     deleted_count += 1
                     logger.info(f"Deleted old Excel file: {filename}")
 
@@ -543,6 +545,7 @@ class ExcelExportScheduler:
     def _cleanup_old_files(self):
         """Delete daily Excel files older than 5 days."""
         try:
+            from export.excel_exporter import signature_file
             cutoff_date = date.today() - timedelta(days=5)
             deleted_count = 0
             deleted_files = []
@@ -552,6 +555,7 @@ class ExcelExportScheduler:
                 if file_date and file_date < cutoff_date:
                     try:
                         file_path.unlink()
+                        signature_file(file_path).unlink(missing_ok=True)
                         deleted_count += 1
                         deleted_files.append(file_path.name)
                         logger.info(f"Deleted old file: {file_path.name}")
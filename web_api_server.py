@@ -7,22 +7,32 @@ import logging
 import sqlite3
 import socket
 import threading
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional
 
 import cv2
 import numpy as np
+import pytz
 import requests
 from fastapi import FastAPI
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-from export.db_queries import get_total_morning, get_realtime_count, get_events
+from export.db_queries import get_total_morning, get_realtime_count, get_events, get_last_event_time
 
 logger = logging.getLogger(__name__)
 
+# Optional libjpeg-turbo encoder for the MJPEG stream (falls back to cv2.imencode)
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _turbo_jpeg = TurboJPEG()
+except Exception as e:  # ImportError, or OSError when the shared library is missing
+    _turbo_jpeg = None
+    logger.debug(f"TurboJPEG not available, using cv2.imencode: {e}")
+
 # Initialize FastAPI app
 app = FastAPI(title="People Counter API", version="1.0.0")
 
@@ -52,12 +62,27 @@ except Exception as e:
     LUNCH_END = "13:15"
     TIMEZONE = "Asia/Ho_Chi_Minh"
 
+# Parsed once at import instead of on every request
+TZ = pytz.timezone(TIMEZONE)
+MORNING_START_TIME = datetime.strptime(MORNING_START, "%H:%M").time()
+MORNING_END_TIME = datetime.strptime(MORNING_END, "%H:%M").time()
+REALTIME_MORNING_END_TIME = datetime.strptime(REALTIME_MORNING_END, "%H:%M").time()
+LUNCH_END_TIME = datetime.strptime(LUNCH_END, "%H:%M").time()
+# "After MORNING_END" as the first HH:MM past it, so it can be used as an ISO range bound
+_after_morning_end = MORNING_END_TIME.hour * 60 + MORNING_END_TIME.minute + 1
+AFTER_MORNING_END_HHMM = f"{_after_morning_end // 60:02d}:{_after_morning_end % 60:02d}"
+
 DB_PATH = "data/people_counter.db"
 PORT = 8000
 
 # Camera stream variables (shared)
 current_frame = None
-frame_lock = threading.Lock()
+current_jpeg = None  # current_frame encoded once, shared by all stream clients
+frame_id = 0  # Bumped on every update_frame; stream clients wait for it to change
+frame_cond = threading.Condition()
+JPEG_QUALITY = 85
+MJPEG_PART_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n'
+_placeholder_jpeg = None
 app_instance = None  # Will be set if main app is running
 camera_cap = None  # Direct camera connection for standalone mode
 
@@ -65,6 +90,12 @@ camera_cap = None  # Direct camera connection for standalone mode
 realtime_data_cache = {}
 realtime_data_lock = threading.Lock()
 
+# Serialized /api/status payload shared by all clients for a short TTL
+STATUS_CACHE_TTL = 0.2  # seconds
+_status_cache_bytes = None
+_status_cache_ts = 0.0
+_status_lock = threading.Lock()
+
 
 def init_camera():
     """Initialize camera connection for standalone mode."""
@@ -148,9 +179,14 @@ def get_lan_ip() -> Optional[str]:
 
 def update_frame(frame):
     """Update current frame for streaming (called by main app or external)."""
-    global current_frame
+    global current_frame, current_jpeg, frame_id
     try:
-        with frame_lock:
+        # Encode once here so every connected client writes the same bytes
+        jpeg = None
+        if frame is not None:
+            jpeg = encode_jpeg(frame)
+        
+        with frame_cond:
             if frame is not None:
                 # Make a copy to avoid issues with frame being modified
                 if isinstance(frame, np.ndarray):
@@ -159,10 +195,56 @@ def update_frame(frame):
                     current_frame = frame
             else:
                 current_frame = None
+            current_jpeg = jpeg
+            frame_id += 1
+            frame_cond.notify_all()
     except Exception as e:
         logger.error(f"Error updating frame: {e}")
 
 
+def encode_jpeg(frame) -> Optional[bytes]:
+    """Encode a BGR frame as JPEG bytes, or None if encoding fails."""
+    if _turbo_jpeg is not None:
+        return _turbo_jpeg.encode(frame, quality=JPEG_QUALITY, pixel_format=TJPF_BGR)
+    ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    return buffer.tobytes() if ok else None
+
+
+def get_placeholder_jpeg() -> Optional[bytes]:
+    """JPEG shown when no camera frame is available (encoded once)."""
+    global _placeholder_jpeg
+    if _placeholder_jpeg is None:
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        cv2.putText(frame, "Camera not available", (150, 200),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        cv2.putText(frame, "Check camera connection", (140, 240),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
+        _placeholder_jpeg = encode_jpeg(frame)
+    return _placeholder_jpeg
+
+
+def _camera_reader_loop():
+    """Read frames from the direct camera connection and publish them via update_frame."""
+    while camera_cap is not None and camera_cap.isOpened():
+        try:
+            ret, frame = camera_cap.read()
+        except Exception as e:
+            logger.debug(f"Error reading from camera: {e}")
+            ret, frame = False, None
+        
+        if ret and frame is not None:
+            update_frame(frame)
+        else:
+            time.sleep(0.1)  # Avoid spinning while the camera recovers
+
+
+def start_camera_reader():
+    """Start the background thread that feeds camera frames to stream clients."""
+    thread = threading.Thread(target=_camera_reader_loop, name="camera-reader", daemon=True)
+    thread.start()
+    return thread
+
+
 def set_app_instance(instance):
     """Set app instance to get camera frame from."""
     global app_instance
@@ -191,7 +273,7 @@ def get_db_data() -> dict:
         global realtime_data_cache, realtime_data_lock
         with realtime_data_lock:
             if realtime_data_cache:
-                today = datetime.now().strftime("%Y-%m-%d")
+                today = datetime.now(TZ).strftime("%Y-%m-%d")
                 cached_data = realtime_data_cache.get(today)
                 if cached_data:
                     # Check if cache is recent (within last 10 seconds)
@@ -225,7 +307,7 @@ def get_db_data() -> dict:
                             time_part = timestamp.split('T')[1].split('+')[0].split('.')[0]
                             last_update = time_part[:8]  # HH:MM:SS
                         else:
-                            last_update = datetime.now().strftime("%H:%M:%S")
+                            last_update = datetime.now(TZ).strftime("%H:%M:%S")
                         
                         return {
                             "date": today,
@@ -249,7 +331,7 @@ def get_db_data() -> dict:
                 
                 # Get total_morning from database/state (the frozen value from morning phase)
                 # This is the correct way: use the saved value, not calculate from initial_count_in/out
-                today = datetime.now().strftime("%Y-%m-%d")
+                today = datetime.now(TZ).strftime("%Y-%m-%d")
                 if hasattr(app_instance, 'storage') and app_instance.storage:
                     state = app_instance.storage.get_daily_state(today)
                     if state and state.get('total_morning') is not None:
@@ -277,7 +359,7 @@ def get_db_data() -> dict:
                 if hasattr(app_instance, 'time_manager') and app_instance.time_manager:
                     phase = app_instance.time_manager.get_current_phase().value
                 
-                last_update = datetime.now().strftime("%H:%M:%S")
+                last_update = datetime.now(TZ).strftime("%H:%M:%S")
                 
                 # Calculate missing (never negative)
                 missing = max(0, total_morning - realtime) if total_morning > 0 else 0
@@ -299,7 +381,7 @@ def get_db_data() -> dict:
         # Fallback to database if app instance not available
         if not Path(DB_PATH).exists():
             logger.warning(f"Database file not found: {DB_PATH}")
-            today = datetime.now().strftime("%Y-%m-%d")
+            today = datetime.now(TZ).strftime("%Y-%m-%d")
             return {
                 "date": today,
                 "total_morning": 0,
@@ -309,7 +391,7 @@ def get_db_data() -> dict:
                 "missing": 0,
                 "missing_now": False,
                 "phase": "morning",
-                "last_update": datetime.now().strftime("%H:%M:%S")
+                "last_update": datetime.now(TZ).strftime("%H:%M:%S")
             }
         
         conn = sqlite3.connect(DB_PATH)
@@ -317,7 +399,7 @@ def get_db_data() -> dict:
         
         try:
             # Get today's date
-            today = datetime.now().strftime("%Y-%m-%d")
+            today = datetime.now(TZ).strftime("%Y-%m-%d")
             
             # Try to get from daily_state first (more accurate, matches app logic)
             cursor.execute("""
@@ -373,25 +455,16 @@ def get_db_data() -> dict:
             missing = max(0, missing)
             
             # Get last update time (last event timestamp or current time)
-            cursor.execute("""
-                SELECT timestamp
-                FROM events
-                WHERE substr(timestamp, 1, 10) = ?
-                ORDER BY timestamp DESC
-                LIMIT 1
-            """, (today,))
-            
-            last_event = cursor.fetchone()
-            if last_event:
+            timestamp = get_last_event_time(cursor, today)
+            if timestamp:
                 # Extract time from ISO timestamp (e.g., "2026-01-07T11:30:45+07:00")
-                timestamp = last_event[0]
                 if 'T' in timestamp:
                     time_part = timestamp.split('T')[1].split('+')[0].split('.')[0]
                     last_update = time_part[:8]  # HH:MM:SS
                 else:
-                    last_update = datetime.now().strftime("%H:%M:%S")
+                    last_update = datetime.now(TZ).strftime("%H:%M:%S")
             else:
-                last_update = datetime.now().strftime("%H:%M:%S")
+                last_update = datetime.now(TZ).strftime("%H:%M:%S")
             
             # Get realtime_in and realtime_out
             if state_row:
@@ -400,42 +473,34 @@ def get_db_data() -> dict:
             else:
                 # Calculate from events if daily_state not available
                 # realtime_in/out are events AFTER morning phase ends (MORNING_END)
-                morning_end_minutes = int(MORNING_END.split(':')[0]) * 60 + int(MORNING_END.split(':')[1])
-                
+                # Plain ISO range on timestamp so idx_events_ts_dir_cam can serve it
+                after_morning = f"{today}T{AFTER_MORNING_END_HHMM}"
+                next_day = (datetime.strptime(today, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
                 cursor.execute("""
                     SELECT COUNT(*) 
                     FROM events
-                    WHERE substr(timestamp, 1, 10) = ?
-                      AND UPPER(direction) = 'IN'
-                      AND CAST(substr(timestamp, 12, 2) AS INTEGER) * 60 + CAST(substr(timestamp, 15, 2) AS INTEGER) > ?
-                """, (today, morning_end_minutes))
+                    WHERE timestamp >= ? AND timestamp < ?
+                      AND direction IN ('IN', 'in')
+                """, (after_morning, next_day))
                 realtime_in = cursor.fetchone()[0] or 0
                 
                 cursor.execute("""
                     SELECT COUNT(*) 
                     FROM events
-                    WHERE substr(timestamp, 1, 10) = ?
-                      AND UPPER(direction) = 'OUT'
-                      AND CAST(substr(timestamp, 12, 2) AS INTEGER) * 60 + CAST(substr(timestamp, 15, 2) AS INTEGER) > ?
-                """, (today, morning_end_minutes))
+                    WHERE timestamp >= ? AND timestamp < ?
+                      AND direction IN ('OUT', 'out')
+                """, (after_morning, next_day))
                 realtime_out = cursor.fetchone()[0] or 0
             
             # Calculate current phase based on time
-            now = datetime.now()
-            current_time = now.time()
+            current_time = datetime.now(TZ).time()
             phase = "morning"  # Default
             
-            # Parse time strings
-            morning_start_time = datetime.strptime(MORNING_START, "%H:%M").time()
-            morning_end_time = datetime.strptime(MORNING_END, "%H:%M").time()
-            realtime_morning_end_time = datetime.strptime(REALTIME_MORNING_END, "%H:%M").time()
-            lunch_end_time = datetime.strptime(LUNCH_END, "%H:%M").time()
-            
-            if morning_start_time <= current_time < morning_end_time:
+            if MORNING_START_TIME <= current_time < MORNING_END_TIME:
                 phase = "morning"
-            elif morning_end_time <= current_time < realtime_morning_end_time:
+            elif MORNING_END_TIME <= current_time < REALTIME_MORNING_END_TIME:
                 phase = "realtime"
-            elif realtime_morning_end_time <= current_time < lunch_end_time:
+            elif REALTIME_MORNING_END_TIME <= current_time < LUNCH_END_TIME:
                 phase = "lunch"
             else:
                 phase = "afternoon"
@@ -461,7 +526,7 @@ def get_db_data() -> dict:
     except Exception as e:
         logger.error(f"Error getting database data: {e}", exc_info=True)
         # Return safe defaults
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = datetime.now(TZ).strftime("%Y-%m-%d")
         return {
                 "date": today,
                 "total_morning": 0,
@@ -471,7 +536,7 @@ def get_db_data() -> dict:
                 "missing": 0,
                 "missing_now": False,
                 "phase": "morning",
-                "last_update": datetime.now().strftime("%H:%M:%S")
+                "last_update": datetime.now(TZ).strftime("%H:%M:%S")
             }
 
 
@@ -500,40 +565,56 @@ async def update_realtime_data(data: RealtimeDataUpdate):
 
 
 @app.get("/api/status", response_model=StatusResponse)
-async def get_status():
+def get_status():
     """
     Get current status from database.
     
     Returns:
         StatusResponse with date, total_morning, realtime_count, missing_now, phase, last_update
+    
+    The serialized payload is cached for STATUS_CACHE_TTL so concurrent
+    dashboard polls share one database read. Declared with plain def so the
+    blocking SQLite work runs in the threadpool, not on the event loop.
     """
+    global _status_cache_bytes, _status_cache_ts
+    with _status_lock:
+        now = time.monotonic()
+        if _status_cache_bytes is None or now - _status_cache_ts > STATUS_CACHE_TTL:
+            _status_cache_bytes = _build_status().model_dump_json().encode("utf-8")
+            _status_cache_ts = now
+        body = _status_cache_bytes
+    return Response(content=body, media_type="application/json")
+
+
+def _build_status() -> StatusResponse:
+    """Build the /api/status payload (never raises)."""
     try:
         data = get_db_data()
         
         return StatusResponse(
-            date=data.get("date", datetime.now().strftime("%Y-%m-%d")),
+            date=data.get("date", datetime.now(TZ).strftime("%Y-%m-%d")),
             total_morning=data.get("total_morning", 0),
             realtime_count=data.get("realtime", 0),
             missing_now=data.get("missing_now", False),
             phase=data.get("phase", "morning"),
-            last_update=data.get("last_update", datetime.now().strftime("%H:%M:%S"))
+            last_update=data.get("last_update", datetime.now(TZ).strftime("%H:%M:%S"))
         )
     except Exception as e:
         logger.error(f"Error in /api/status: {e}", exc_info=True)
         # Return safe defaults
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = datetime.now(TZ).strftime("%Y-%m-%d")
         return StatusResponse(
             date=today,
             total_morning=0,
             realtime_count=0,
             missing_now=False,
             phase="morning",
-            last_update=datetime.now().strftime("%H:%M:%S")
+            last_update=datetime.now(TZ).strftime("%H:%M:%S")
         )
 
 
 @app.get("/api/events")
-async def get_events_api(limit: int = 50):
+def get_events_api(limit: int = 50):
     """
     Get recent events from database.
     
@@ -551,7 +632,7 @@ async def get_events_api(limit: int = 50):
         cursor = conn.cursor()
         
         try:
-            today = datetime.now().strftime("%Y-%m-%d")
+            today = datetime.now(TZ).strftime("%Y-%m-%d")
             events = get_events(cursor, today)
             
             # Return most recent events (limit)
@@ -587,52 +668,38 @@ async def get_events_api(limit: int = 50):
 @app.get("/video")
 async def video_stream():
     """
-    Serve MJPEG camera stream directly from camera.
-    Reads camera directly, no proxy needed.
+    Serve MJPEG camera stream.
+    Frames are pushed and JPEG-encoded once by update_frame (camera reader
+    thread or main app); each client waits for a new frame and writes the
+    shared bytes, so there is no per-client encoding.
     """
-    import asyncio
-    
-    async def generate_frames():
+    def generate_frames():
+        last_seen_id = -1
         while True:
-            frame = None
+            # Wait for a new frame; time out so placeholder/last frame keeps flowing
+            with frame_cond:
+                frame_cond.wait_for(lambda: frame_id != last_seen_id, timeout=1.0)
+                jpeg = current_jpeg
+                last_seen_id = frame_id
             
-            # Try to get frame from direct camera connection
-            if camera_cap is not None and camera_cap.isOpened():
+            # If no frame, send placeholder
+            if jpeg is None:
                 try:
-                    ret, frame = camera_cap.read()
-                    if not ret or frame is None:
-                        frame = None
+                    jpeg = get_placeholder_jpeg()
                 except Exception as e:
-                    logger.debug(f"Error reading from camera: {e}")
-                    frame = None
-            
-            # If no frame, create placeholder
-            if frame is None:
-                frame = np.zeros((480, 640, 3), dtype=np.uint8)
-                cv2.putText(frame, "Camera not available", (150, 200),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-                cv2.putText(frame, "Check camera connection", (140, 240),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
-            
-            # Encode frame as JPEG
-            try:
-                ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                if ok:
-                    fb = buffer.tobytes()
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + fb + b'\r\n')
-            except Exception as e:
-                logger.error(f"Error encoding frame: {e}")
+                    logger.error(f"Error encoding placeholder frame: {e}")
+                if jpeg is None:
+                    continue
             
-            await asyncio.sleep(0.033)  # ~30 FPS
+            yield MJPEG_PART_HEADER % len(jpeg) + jpeg + b'\r\n'
 
+    # Sync generator: Starlette iterates it in a worker thread, so the blocking
+    # wait on frame_cond does not stall the event loop
     return StreamingResponse(generate_frames(), media_type="multipart/x-mixed-replace; boundary=frame")
 
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    """Serve HTML dashboard."""
-    html = """
+# Dashboard page: static, so encode once at import instead of per request
+DASHBOARD_HTML = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -901,7 +968,13 @@ async def root():
 </body>
 </html>
 """
-    return html
+_DASHBOARD_BYTES = DASHBOARD_HTML.encode("utf-8")
+
+
+@app.get("/", response_class=HTMLResponse)
+async def root():
+    """Serve HTML dashboard."""
+    return HTMLResponse(content=_DASHBOARD_BYTES)
 
 
 if __name__ == "__main__":
@@ -912,6 +985,7 @@ if __name__ == "__main__":
     camera_ok = init_camera()
     if camera_ok:
         logger.info("Camera initialized successfully")
+        start_camera_reader()
     else:
         logger.warning("Camera not available. Stream will show placeholder.")
         logger.warning("   Make sure camera is connected and configured in .env file")